@@ -0,0 +1,315 @@
+#!/usr/bin/env python
+"""Benchmarks for the public entry points of swb.
+
+Run "python benchmarks/run_benchmarks.py --help" for usage. swb must be importable:
+install the working tree with "pip install -e .[pandas]", or run this from the
+repository root with PYTHONPATH=. in the environment.
+
+The results are written as JSON. For each benchmark, series length (days), number of
+fields and irrigation mode, it records the best time over a number of repetitions,
+the throughput in field-days per second, and the peak memory allocated during a
+separate run (measured with tracemalloc). Each benchmark is first run once, untimed,
+on small inputs, so that the times do not include loading or compiling the numba
+code. Use --compare to compare the results with those of a previous run.
+"""
+
+import argparse
+import datetime as dt
+import json
+import platform
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+import swb
+from swb.backends import BACKENDS, resolve_backend
+
+DAY_COUNTS = (180, 3650, 36500)  # A season, 10 years, 100 years
+FIELD_COUNTS = (1, 100, 10000)
+IRRIGATION_MODES = ("numeric", "model", "fc", "mixed")
+SOIL_PARAMETERS = {
+    "theta_s": 0.425,
+    "theta_fc": 0.287,
+    "theta_wp": 0.14,
+    "zr": 0.5,
+    "zr_factor": 1000,
+    "p": 0.5,
+    "draintime": 16.3,
+    "theta_init": 0.2,
+    "refill_factor": 0.8,
+}
+KC_PARAMETERS = {
+    "kc_offseason": 0.3,
+    "kc_plantingdate": 0.7,
+    "kc_stages": (
+        swb.KcStage(35, 0.7),
+        swb.KcStage(45, 1.05),
+        swb.KcStage(40, 1.05),
+        swb.KcStage(15, 0.95),
+    ),
+}
+
+
+def make_inputs(ndays, nfields, irrigation_mode, seed=0):
+    """Generate synthetic daily inputs for nfields fields."""
+    rng = np.random.default_rng(seed)
+    shape = (nfields, ndays)
+    precipitation = rng.uniform(0, 1, shape) ** 8 * 100
+    ref_evapotranspiration = 4 + 3 * np.sin(np.arange(ndays) * 2 * np.pi / 365.25)
+    ref_evapotranspiration = ref_evapotranspiration + rng.uniform(-1, 1, shape)
+    if irrigation_mode == "numeric":
+        irrigation = rng.choice([0.0, 0.0, 0.0, 25.0], shape)
+    elif irrigation_mode == "mixed":
+        irrigation = rng.choice(
+            np.array([0.0, 25.0, "model", "fc"], dtype=object), shape
+        )
+    else:
+        irrigation = np.full(shape, irrigation_mode, dtype=object)
+    return {
+        "dates": pd.date_range("1950-01-01", periods=ndays),
+        "precipitation": precipitation,
+        "ref_evapotranspiration": ref_evapotranspiration,
+        "effective_precipitation": precipitation * 0.8,
+        "crop_evapotranspiration": ref_evapotranspiration * 0.9,
+        "actual_net_irrigation": irrigation,
+    }
+
+
+def _dataframes(inputs, columns):
+    return [
+        pd.DataFrame(
+            data={column: inputs[column][i] for column in columns},
+            index=inputs["dates"],
+        )
+        for i in range(len(inputs[columns[0]]))
+    ]
+
+
+def setup_soil_water(inputs):
+    columns = (
+        "effective_precipitation",
+        "crop_evapotranspiration",
+        "actual_net_irrigation",
+    )
+    return _dataframes(inputs, columns)
+
+
+def run_soil_water(dataframes, backend):
+    for dataframe in dataframes:
+        swb.calculate_soil_water(
+            timeseries=dataframe, backend=backend, **SOIL_PARAMETERS
+        )
+
+
+def setup_soil_water_batch(inputs):
+    return inputs
+
+
+def run_soil_water_batch(inputs, backend):
+    swb.calculate_soil_water_batch(
+        effective_precipitation=inputs["effective_precipitation"],
+        crop_evapotranspiration=inputs["crop_evapotranspiration"],
+        actual_net_irrigation=inputs["actual_net_irrigation"],
+        backend=backend,
+        **SOIL_PARAMETERS,
+    )
+
+
+def setup_crop_evapotranspiration(inputs):
+    return _dataframes(inputs, ("ref_evapotranspiration",))
+
+
+def run_crop_evapotranspiration(dataframes, backend):
+    for dataframe in dataframes:
+        swb.calculate_crop_evapotranspiration(
+            timeseries=dataframe, planting_date=dt.date(1950, 3, 21), **KC_PARAMETERS
+        )
+
+
+def setup_effective_precipitation(inputs):
+    return _dataframes(inputs, ("precipitation", "ref_evapotranspiration"))
+
+
+def run_effective_precipitation(dataframes, backend):
+    for dataframe in dataframes:
+        swb.get_effective_precipitation(dataframe)
+
+
+# Each benchmark is (setup function, run function, whether it depends on irrigation).
+# The setup function's result is passed to the run function (together with the
+# backend, which only the soil water balance uses) and is not timed.
+BENCHMARKS = {
+    "calculate_soil_water": (setup_soil_water, run_soil_water, True),
+    "calculate_soil_water_batch": (
+        setup_soil_water_batch,
+        run_soil_water_batch,
+        True,
+    ),
+    "calculate_crop_evapotranspiration": (
+        setup_crop_evapotranspiration,
+        run_crop_evapotranspiration,
+        False,
+    ),
+    "get_effective_precipitation": (
+        setup_effective_precipitation,
+        run_effective_precipitation,
+        False,
+    ),
+}
+
+
+def measure(setup, run, inputs, repeat, backend):
+    best = float("inf")
+    for i in range(repeat):
+        data = setup(inputs)
+        start = time.perf_counter()
+        run(data, backend)
+        best = min(best, time.perf_counter() - start)
+    data = setup(inputs)
+    tracemalloc.start()
+    try:
+        run(data, backend)
+        peak_memory = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return best, peak_memory
+
+
+def run_benchmarks(names, day_counts, field_counts, max_field_days, repeat, backend):
+    results = []
+    for name in names:
+        setup, run, depends_on_irrigation = BENCHMARKS[name]
+        run(setup(make_inputs(10, 1, "mixed")), backend)  # Warm-up
+        irrigation_modes = IRRIGATION_MODES if depends_on_irrigation else ("numeric",)
+        for ndays in day_counts:
+            for nfields in field_counts:
+                if ndays * nfields > max_field_days:
+                    continue
+                for irrigation_mode in irrigation_modes:
+                    inputs = make_inputs(ndays, nfields, irrigation_mode)
+                    seconds, peak_memory = measure(setup, run, inputs, repeat, backend)
+                    result = {
+                        "benchmark": name,
+                        "days": ndays,
+                        "fields": nfields,
+                        "irrigation": (
+                            irrigation_mode if depends_on_irrigation else None
+                        ),
+                        "seconds": seconds,
+                        "field_days_per_second": ndays * nfields / seconds,
+                        "peak_memory_bytes": peak_memory,
+                    }
+                    results.append(result)
+                    sys.stderr.write(_format_result(result) + "\n")
+    return results
+
+
+def _format_result(result):
+    return (
+        "{benchmark} days={days} fields={fields} irrigation={irrigation}: ".format(
+            **result
+        )
+        + "{seconds:.4f} s, {field_days_per_second:.3g} field-days/s, ".format(**result)
+        + "{:.1f} MB".format(result["peak_memory_bytes"] / 1e6)
+    )
+
+
+def _key(result):
+    return (result["benchmark"], result["days"], result["fields"], result["irrigation"])
+
+
+def compare(old_results, new_results):
+    """Return lines comparing the throughput of two runs."""
+    old = {_key(result): result for result in old_results}
+    lines = []
+    for result in new_results:
+        previous = old.get(_key(result))
+        if previous is None:
+            continue
+        ratio = result["field_days_per_second"] / previous["field_days_per_second"]
+        lines.append(
+            "{} days={} fields={} irrigation={}: ".format(*_key(result))
+            + "{:.2f}x throughput".format(ratio)
+        )
+    return lines
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run the swb benchmarks.")
+    parser.add_argument(
+        "--benchmarks",
+        nargs="+",
+        choices=list(BENCHMARKS),
+        default=list(BENCHMARKS),
+        help="Which benchmarks to run (default: all)",
+    )
+    parser.add_argument(
+        "--days", nargs="+", type=int, default=DAY_COUNTS, help="Series lengths"
+    )
+    parser.add_argument(
+        "--fields", nargs="+", type=int, default=FIELD_COUNTS, help="Field counts"
+    )
+    parser.add_argument(
+        "--max-field-days",
+        type=float,
+        default=4e6,
+        help="Skip combinations with more field-days than this (default: 4e6)",
+    )
+    parser.add_argument("--repeat", type=int, default=3, help="Repetitions")
+    parser.add_argument(
+        "--backend",
+        choices=BACKENDS,
+        default="auto",
+        help="The backend of the soil water balance (default: auto)",
+    )
+    parser.add_argument(
+        "--quick",
+        action="store_true",
+        help="Only run the smallest sizes once (a smoke test)",
+    )
+    parser.add_argument("--output", help="Write the JSON results to this file")
+    parser.add_argument("--compare", help="Compare with the JSON results in this file")
+    args = parser.parse_args(argv)
+    if args.quick:
+        args.days = args.days[:1]
+        args.fields = args.fields[:1]
+        args.repeat = 1
+
+    results = run_benchmarks(
+        args.benchmarks,
+        args.days,
+        args.fields,
+        args.max_field_days,
+        args.repeat,
+        args.backend,
+    )
+    report = {
+        "metadata": {
+            "date": dt.datetime.now(dt.timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "swb": swb.__version__,
+            "numpy": np.__version__,
+            "pandas": pd.__version__,
+            "backend": resolve_backend(args.backend),
+        },
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+        sys.stdout.write("\n")
+    if args.compare:
+        with open(args.compare) as f:
+            old_report = json.load(f)
+        for line in compare(old_report["results"], results):
+            sys.stderr.write(line + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -11,11 +11,17 @@ with open("README.rst") as readme_file:
 with open("HISTORY.rst") as history_file:
     history = history_file.read()
 
-requirements = ["pandas>=0.20"]
+requirements = ["numpy>=1.20"]
+
+extras_requirements = {
+    "pandas": ["pandas>=0.24"],
+    "arrow": ["pyarrow"],
+    "numba": ["numba"],
+}
 
 setup_requirements = []
 
-test_requirements = []
+test_requirements = ["pandas>=0.24"]
 
 
 def get_version():
@@ -34,15 +40,19 @@ setup(
         "Intended Audience :: Developers",
         "License :: OSI Approved :: GNU General Public License v3 (GPLv3)",
         "Natural Language :: English",
-        "Programming Language :: Python :: 3.5",
-        "Programming Language :: Python :: 3.6",
+        "Programming Language :: Python :: 3.8",
+        "Programming Language :: Python :: 3.9",
+        "Programming Language :: Python :: 3.10",
+        "Programming Language :: Python :: 3.11",
     ],
     description="Calculation of soil water balance",
     install_requires=requirements,
+    extras_require=extras_requirements,
     license="GNU General Public License v3",
     long_description=readme + "\n\n" + history,
     include_package_data=True,
     packages=find_packages(include=["swb"]),
+    python_requires=">=3.8",
     setup_requires=setup_requirements,
     test_suite="tests",
     tests_require=test_requirements,
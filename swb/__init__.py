@@ -1,5 +1,17 @@
+from .aio import *  # NOQA
+from .batch import *  # NOQA
+from .cache import *  # NOQA
+from .columnar import *  # NOQA
 from .crop_evapotranspiration import *  # NOQA
 from .effective_precipitation import *  # NOQA
+from .ensemble import *  # NOQA
+from .gridded import *  # NOQA
+from .outofcore import *  # NOQA
+from .parallel import *  # NOQA
+from .pipeline import *  # NOQA
+from .result import *  # NOQA
+from .scheduling import *  # NOQA
 from .swb import *  # NOQA
+from .sweep import *  # NOQA
 
 __version__ = "0.1.0.dev0"
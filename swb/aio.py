@@ -0,0 +1,110 @@
+import functools
+import time
+
+import numpy as np
+
+from .cache import _content_key
+from .swb import calculate_soil_water_arrays, encode_actual_net_irrigation
+
+_TIMESERIES = ("effective_precipitation", "crop_evapotranspiration")
+
+
+class AsyncCalculator(object):
+    """Runs calculate_soil_water_arrays() from asyncio code.
+
+    The calculations are run on "executor" (a concurrent.futures executor), so that
+    they don't block the event loop; if it is not specified, a thread pool with
+    "max_workers" threads is created (and shut down by close()). Requests with the
+    same arguments that arrive while an identical calculation is running are not
+    calculated again; they get the result of that calculation.
+    """
+
+    def __init__(self, *, executor=None, max_workers=None):
+        # asyncio and concurrent.futures are imported only when needed, because
+        # importing them slows down "import swb".
+        from concurrent.futures import ThreadPoolExecutor
+
+        self._own_executor = executor is None
+        self.executor = executor or ThreadPoolExecutor(max_workers=max_workers)
+        self._running = {}
+        self.requests = 0
+        self.coalesced = 0
+        self.calculations = 0
+        self.max_queue_depth = 0
+        self.total_latency = 0.0
+        self.max_latency = 0.0
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def close(self):
+        if self._own_executor:
+            self.executor.shutdown()
+
+    @property
+    def queue_depth(self):
+        # The number of calculations that have been submitted and not finished
+        return len(self._running)
+
+    def stats(self):
+        return {
+            "requests": self.requests,
+            "coalesced": self.coalesced,
+            "calculations": self.calculations,
+            "queue_depth": self.queue_depth,
+            "max_queue_depth": self.max_queue_depth,
+            "mean_latency": (
+                self.total_latency / self.calculations if self.calculations else 0.0
+            ),
+            "max_latency": self.max_latency,
+        }
+
+    async def calculate_soil_water_arrays(self, **kwargs):
+        import asyncio
+
+        self.requests += 1
+        key = _request_key(kwargs)
+        future = self._running.get(key)
+        if future is None:
+            future = asyncio.ensure_future(self._calculate(kwargs))
+            self._running[key] = future
+            future.add_done_callback(lambda future: self._running.pop(key))
+            self.max_queue_depth = max(self.max_queue_depth, self.queue_depth)
+        else:
+            self.coalesced += 1
+
+        # The calculation is shielded so that cancelling one of the requests that
+        # wait for it does not cancel it for the rest. Each request gets its own
+        # dictionary, but the arrays in it are shared.
+        return dict(await asyncio.shield(future))
+
+    async def _calculate(self, kwargs):
+        import asyncio
+
+        start = time.perf_counter()
+        result = await asyncio.get_running_loop().run_in_executor(
+            self.executor, functools.partial(calculate_soil_water_arrays, **kwargs)
+        )
+        latency = time.perf_counter() - start
+        self.calculations += 1
+        self.total_latency += latency
+        self.max_latency = max(self.max_latency, latency)
+        return result
+
+
+def _request_key(kwargs):
+    # Returns a digest of the arguments of calculate_soil_water_arrays(). The time
+    # series are hashed by content; the rest of the arguments by their repr().
+    values = []
+    for name in sorted(kwargs):
+        value = kwargs[name]
+        if name == "actual_net_irrigation":
+            values.extend((name, *encode_actual_net_irrigation(value)))
+        elif name in _TIMESERIES:
+            values.extend((name, np.asarray(value, dtype=float)))
+        else:
+            values.append((name, value))
+    return _content_key(*values)
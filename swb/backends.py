@@ -0,0 +1,120 @@
+import importlib.util
+from functools import lru_cache
+
+from .swb import IRRIGATION_FC, IRRIGATION_MODEL
+
+# The "numpy" backend is the reference implementation (the loops in
+# SoilWaterBalance._calculate_arrays() and batch._calculate_batch()). The "numba"
+# backend compiles _recurrence() below. "auto" selects "numba" if numba is installed.
+BACKENDS = ("auto", "numba", "numpy")
+
+
+def resolve_backend(backend):
+    if backend not in BACKENDS:
+        raise ValueError(
+            "Unknown backend {!r}; should be one of {}".format(
+                backend, ", ".join(BACKENDS)
+            )
+        )
+    if backend == "auto":
+        return "numba" if _have_numba() else "numpy"
+    return backend
+
+
+@lru_cache(maxsize=None)
+def _have_numba():
+    # Looking for numba takes longer than a short calculation, so it is done once
+    return importlib.util.find_spec("numba") is not None
+
+
+@lru_cache(maxsize=None)
+def compiled_recurrence():
+    # numba is imported only when first needed, because importing it is slow
+    import numba
+
+    return numba.njit(cache=True)(_recurrence)
+
+
+def _recurrence(
+    theta_s,
+    theta_fc,
+    zr,
+    zr_factor,
+    p,
+    draintime,
+    refill_factor,
+    taw,
+    raw,
+    effective_precipitation,
+    crop_evapotranspiration,
+    irrigation_mode,
+    irrigation_amount,
+    theta_prev,
+    dr_prev,
+    dr_result,
+    theta_result,
+    ks_result,
+    recommended_result,
+    assumed_result,
+):
+    # The parameters are vectors with one item per field, and the time series are
+    # (days x fields) arrays. theta_prev and dr_prev are vectors with the initial
+    # state; they are updated in place and at the end contain the final state.
+    #
+    # This is the same calculation as in SoilWaterBalance._calculate_arrays(), with
+    # the same order of floating point operations. min() and max() are written as
+    # comparisons that behave like Python's for NaN.
+    ndays, nfields = effective_precipitation.shape
+    for i in range(ndays):
+        for j in range(nfields):
+            peff = effective_precipitation[i, j]
+            zr_j = zr[j]
+            zr_factor_j = zr_factor[j]
+            ks = (taw[j] - dr_prev[j]) / ((1 - p[j]) * taw[j])
+            if 1 < ks:
+                ks = 1.0
+            ro = peff + (theta_prev[j] - theta_s[j]) * zr_j * zr_factor_j
+            if 0 > ro:
+                ro = 0.0
+            theta_dp = theta_prev[j]
+            if theta_s[j] < theta_dp:
+                theta_dp = theta_s[j]
+            excess_water = (
+                theta_dp * zr_j * zr_factor_j - theta_fc[j] * zr_j * zr_factor_j + peff
+            )
+            if 0 > excess_water:
+                excess_water = 0.0
+            dp = excess_water / draintime[j]
+            dr_without_irrig = (
+                dr_prev[j] - (peff - ro) + crop_evapotranspiration[i, j] * ks + dp
+            )
+            if dr_without_irrig > raw[j]:
+                recommended_net_irrigation = dr_without_irrig * refill_factor[j]
+            else:
+                recommended_net_irrigation = 0.0
+
+            mode = irrigation_mode[i, j]
+            if mode == IRRIGATION_MODEL:
+                assumed_net_irrigation = recommended_net_irrigation
+            elif mode == IRRIGATION_FC:
+                dr_saturation = (theta_fc[j] - theta_s[j]) * zr_j * zr_factor_j
+                if dr_without_irrig > 0:
+                    assumed_net_irrigation = dr_without_irrig
+                elif dr_without_irrig > dr_saturation:
+                    assumed_net_irrigation = dr_without_irrig - dr_saturation
+                else:
+                    assumed_net_irrigation = 0.0
+            else:
+                assumed_net_irrigation = irrigation_amount[i, j]
+
+            dr = dr_without_irrig - assumed_net_irrigation
+            if taw[j] < dr:
+                dr = taw[j]
+            theta = theta_fc[j] - dr / (zr_j * zr_factor_j)
+            dr_result[i, j] = dr
+            theta_result[i, j] = theta
+            ks_result[i, j] = ks
+            recommended_result[i, j] = recommended_net_irrigation
+            assumed_result[i, j] = assumed_net_irrigation
+            theta_prev[j] = theta
+            dr_prev[j] = dr
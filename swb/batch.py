@@ -0,0 +1,276 @@
+import numpy as np
+
+from .backends import compiled_recurrence, resolve_backend
+from .swb import (
+    IRRIGATION_FC,
+    IRRIGATION_MODEL,
+    OUTPUT_COLUMNS,
+    encode_actual_net_irrigation,
+)
+
+_PARAMETERS = (
+    "theta_s",
+    "theta_fc",
+    "theta_wp",
+    "zr",
+    "zr_factor",
+    "p",
+    "draintime",
+    "theta_init",
+    "refill_factor",
+)
+
+
+def calculate_soil_water_batch(
+    *,
+    theta_s,
+    theta_fc,
+    theta_wp,
+    zr,
+    zr_factor,
+    p,
+    draintime,
+    theta_init,
+    refill_factor,
+    effective_precipitation,
+    crop_evapotranspiration,
+    actual_net_irrigation=0.0,
+    backend="auto",
+):
+    # The soil and crop parameters may be scalars or vectors with one item per field.
+    # The time series may be (fields x days) arrays, or one-dimensional arrays when
+    # all fields share the same time series.
+    effective_precipitation = np.asarray(effective_precipitation, dtype=float)
+    crop_evapotranspiration = np.asarray(crop_evapotranspiration, dtype=float)
+    irrigation_mode, irrigation_amount = encode_actual_net_irrigation(
+        actual_net_irrigation
+    )
+    params = {
+        "theta_s": theta_s,
+        "theta_fc": theta_fc,
+        "theta_wp": theta_wp,
+        "zr": zr,
+        "zr_factor": zr_factor,
+        "p": p,
+        "draintime": draintime,
+        "theta_init": theta_init,
+        "refill_factor": refill_factor,
+    }
+    params = {
+        name: np.atleast_1d(np.asarray(value, dtype=float))
+        for name, value in params.items()
+    }
+    ndays = effective_precipitation.shape[-1]
+    nfields = np.broadcast_shapes(
+        *[value.shape for value in params.values()],
+        effective_precipitation.shape[:-1],
+        crop_evapotranspiration.shape[:-1],
+        irrigation_mode.shape[:-1],
+    )[0]
+    result = _run_batch(
+        {name: np.broadcast_to(value, (nfields,)) for name, value in params.items()},
+        effective_precipitation=_days_by_fields(
+            effective_precipitation, nfields, ndays
+        ),
+        crop_evapotranspiration=_days_by_fields(
+            crop_evapotranspiration, nfields, ndays
+        ),
+        irrigation_mode=_days_by_fields(irrigation_mode, nfields, ndays),
+        irrigation_amount=_days_by_fields(irrigation_amount, nfields, ndays),
+        backend=backend,
+    )
+    for name in OUTPUT_COLUMNS:
+        result[name] = result[name].T
+    return result
+
+
+def _run_batch(
+    params,
+    *,
+    effective_precipitation,
+    crop_evapotranspiration,
+    irrigation_mode,
+    irrigation_amount,
+    backend="auto",
+    initial_dr=None,
+):
+    # "params" is a dictionary with a vector with one item per field for each item
+    # of _PARAMETERS, and the time series are (days x fields) arrays. Returns a
+    # dictionary with the (days x fields) output arrays plus raw and taw. The
+    # initial depletion is calculated from theta_init unless "initial_dr" is
+    # specified (when resuming from a previous state). The time series may also be
+    # anything that can be broadcast to (days x fields), such as a (days x 1) array
+    # shared by all fields; they are broadcast here (without copying), because the
+    # compiled recurrence indexes them without checking their shape.
+    ndays = np.shape(effective_precipitation)[0]
+    nfields = len(params["theta_fc"])
+    (
+        effective_precipitation,
+        crop_evapotranspiration,
+        irrigation_mode,
+        irrigation_amount,
+    ) = (
+        np.broadcast_to(a, (ndays, nfields))
+        for a in (
+            effective_precipitation,
+            crop_evapotranspiration,
+            irrigation_mode,
+            irrigation_amount,
+        )
+    )
+    taw = (params["theta_fc"] - params["theta_wp"]) * params["zr"] * params["zr_factor"]
+    raw = params["p"] * taw
+    if initial_dr is None:
+        initial_dr = (
+            (params["theta_fc"] - params["theta_init"])
+            * params["zr"]
+            * params["zr_factor"]
+        )
+    if resolve_backend(backend) == "numba":
+        calculate = _calculate_batch_compiled
+    else:
+        calculate = _calculate_batch
+    result = calculate(
+        theta_s=params["theta_s"],
+        theta_fc=params["theta_fc"],
+        zr=params["zr"],
+        zr_factor=params["zr_factor"],
+        p=params["p"],
+        draintime=params["draintime"],
+        refill_factor=params["refill_factor"],
+        taw=taw,
+        raw=raw,
+        effective_precipitation=effective_precipitation,
+        crop_evapotranspiration=crop_evapotranspiration,
+        irrigation_mode=irrigation_mode,
+        irrigation_amount=irrigation_amount,
+        theta_prev=params["theta_init"],
+        dr_prev=initial_dr,
+    )
+    result["raw"] = raw
+    result["taw"] = taw
+    return result
+
+
+def _days_by_fields(a, nfields, ndays):
+    """Return a contiguous (days x fields) array from a (fields x days) one.
+
+    If "a" is not two-dimensional, it is broadcast; the result is then a read-only
+    view, so that a time series shared by all fields (or a single value) is not
+    copied for each field.
+    """
+    if np.ndim(a) < 2:
+        return np.broadcast_to(a, (nfields, ndays)).T
+    return np.ascontiguousarray(np.broadcast_to(a, (nfields, ndays)).T)
+
+
+def _calculate_batch_compiled(
+    *,
+    theta_s,
+    theta_fc,
+    zr,
+    zr_factor,
+    p,
+    draintime,
+    refill_factor,
+    taw,
+    raw,
+    effective_precipitation,
+    crop_evapotranspiration,
+    irrigation_mode,
+    irrigation_amount,
+    theta_prev,
+    dr_prev,
+):
+    # Same as _calculate_batch(), but with the numba backend
+    result = {name: np.empty(effective_precipitation.shape) for name in OUTPUT_COLUMNS}
+    compiled_recurrence()(
+        theta_s,
+        theta_fc,
+        zr,
+        zr_factor,
+        p,
+        draintime,
+        refill_factor,
+        taw,
+        raw,
+        effective_precipitation,
+        crop_evapotranspiration,
+        irrigation_mode,
+        irrigation_amount,
+        np.array(theta_prev, dtype=float),
+        np.array(dr_prev, dtype=float),
+        *result.values(),
+    )
+    return result
+
+
+def _calculate_batch(
+    *,
+    theta_s,
+    theta_fc,
+    zr,
+    zr_factor,
+    p,
+    draintime,
+    refill_factor,
+    taw,
+    raw,
+    effective_precipitation,
+    crop_evapotranspiration,
+    irrigation_mode,
+    irrigation_amount,
+    theta_prev,
+    dr_prev,
+):
+    # This performs the same calculation as SoilWaterBalance._calculate_arrays(),
+    # but for many fields at once. The parameters are vectors with one item per
+    # field, and the time series are (days x fields) arrays. The operations are
+    # the same and in the same order, so the results for each field are identical
+    # to those of SoilWaterBalance.
+    zr_mm = zr * zr_factor
+    theta_fc_mm = theta_fc * zr * zr_factor
+    dr_saturation = (theta_fc - theta_s) * zr * zr_factor
+    ks_denominator = (1 - p) * taw
+
+    shape = effective_precipitation.shape
+    result = {
+        "dr": np.empty(shape),
+        "theta": np.empty(shape),
+        "ks": np.empty(shape),
+        "recommended_net_irrigation": np.empty(shape),
+        "assumed_net_irrigation": np.empty(shape),
+    }
+    for i in range(shape[0]):
+        peff = effective_precipitation[i]
+        ks = np.minimum((taw - dr_prev) / ks_denominator, 1)
+        ro = np.maximum(peff + (theta_prev - theta_s) * zr * zr_factor, 0)
+        theta_dp = np.minimum(theta_prev, theta_s)
+        dp = np.maximum(theta_dp * zr * zr_factor - theta_fc_mm + peff, 0) / draintime
+        dr_without_irrig = dr_prev - (peff - ro) + crop_evapotranspiration[i] * ks + dp
+        recommended_net_irrigation = np.where(
+            dr_without_irrig > raw, dr_without_irrig * refill_factor, 0
+        )
+        fc_net_irrigation = np.where(
+            dr_without_irrig > 0,
+            dr_without_irrig,
+            np.where(
+                dr_without_irrig > dr_saturation, dr_without_irrig - dr_saturation, 0
+            ),
+        )
+        mode = irrigation_mode[i]
+        assumed_net_irrigation = np.where(
+            mode == IRRIGATION_MODEL,
+            recommended_net_irrigation,
+            np.where(mode == IRRIGATION_FC, fc_net_irrigation, irrigation_amount[i]),
+        )
+        dr = np.minimum(dr_without_irrig - assumed_net_irrigation, taw)
+        theta = theta_fc - dr / zr_mm
+        result["dr"][i] = dr
+        result["theta"][i] = theta
+        result["ks"][i] = ks
+        result["recommended_net_irrigation"][i] = recommended_net_irrigation
+        result["assumed_net_irrigation"][i] = assumed_net_irrigation
+        theta_prev = theta
+        dr_prev = dr
+    return result
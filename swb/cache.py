@@ -0,0 +1,167 @@
+import hashlib
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+
+class ResultCache(object):
+    """A cache of calculation results, keyed by a digest of the calculation inputs.
+
+    An entry is a dictionary of numpy arrays. Entries are kept in memory, up to
+    "max_memory_bytes"; if "directory" is specified, they are also stored there as
+    .npz files, up to "max_disk_bytes". When a limit is exceeded, the least recently
+    used entries are evicted. It can be used by many threads at once.
+    """
+
+    def __init__(
+        self,
+        *,
+        max_memory_bytes=256 * 2**20,
+        directory=None,
+        max_disk_bytes=2**30,
+    ):
+        self.max_memory_bytes = max_memory_bytes
+        self.directory = directory
+        self.max_disk_bytes = max_disk_bytes
+        self._lock = threading.Lock()
+        self._memory = OrderedDict()
+        self.memory_bytes = 0
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        if directory is not None:
+            os.makedirs(directory, exist_ok=True)
+        self.disk_bytes = sum(
+            os.path.getsize(filename) for filename in self._filenames()
+        )
+
+    def stats(self):
+        with self._lock:
+            return {
+                "hits": self.memory_hits + self.disk_hits,
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "memory_bytes": self.memory_bytes,
+                "disk_bytes": self.disk_bytes,
+            }
+
+    def get(self, key):
+        # Returns a new dictionary with copies of the arrays of the entry (so that
+        # the caller may modify them), or None if there is no such entry.
+        with self._lock:
+            return self._get(key)
+
+    def _get(self, key):
+        entry = self._memory.get(key)
+        if entry is not None:
+            self._memory.move_to_end(key)
+            self.memory_hits += 1
+            return {name: value.copy() for name, value in entry.items()}
+        entry = self._read(key)
+        if entry is not None:
+            self.disk_hits += 1
+            self._remember(key, entry)
+            return {name: value.copy() for name, value in entry.items()}
+        self.misses += 1
+        return None
+
+    def put(self, key, entry):
+        entry = {name: np.array(value) for name, value in entry.items()}
+        with self._lock:
+            self._remember(key, entry)
+            if self.directory is not None:
+                self._write(key, entry)
+
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+            self.memory_bytes = 0
+            for filename in self._filenames():
+                os.remove(filename)
+            self.disk_bytes = 0
+
+    def _remember(self, key, entry):
+        nbytes = sum(value.nbytes for value in entry.values())
+        if nbytes > self.max_memory_bytes:
+            return
+        if key in self._memory:
+            self.memory_bytes -= sum(
+                value.nbytes for value in self._memory[key].values()
+            )
+        self._memory[key] = entry
+        self.memory_bytes += nbytes
+        while self.memory_bytes > self.max_memory_bytes:
+            _, evicted = self._memory.popitem(last=False)
+            self.memory_bytes -= sum(value.nbytes for value in evicted.values())
+            self.evictions += 1
+
+    def _filename(self, key):
+        return os.path.join(self.directory, key.hex() + ".npz")
+
+    def _filenames(self):
+        if self.directory is None:
+            return []
+        return [
+            os.path.join(self.directory, filename)
+            for filename in os.listdir(self.directory)
+            if filename.endswith(".npz")
+        ]
+
+    def _read(self, key):
+        if self.directory is None:
+            return None
+        filename = self._filename(key)
+        try:
+            with np.load(filename) as npz:
+                entry = {name: npz[name] for name in npz.files}
+        except FileNotFoundError:
+            return None
+        os.utime(filename)  # The modification time marks the last use
+        return entry
+
+    def _write(self, key, entry):
+        # The file is written under a temporary name and renamed, so that readers
+        # never see a partially written file.
+        filename = self._filename(key)
+        fd, tmpname = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        with os.fdopen(fd, "wb") as f:
+            np.savez(f, **entry)
+        if os.path.exists(filename):
+            self.disk_bytes -= os.path.getsize(filename)
+        os.replace(tmpname, filename)
+        self.disk_bytes += os.path.getsize(filename)
+        if self.disk_bytes > self.max_disk_bytes:
+            self._evict_from_disk()
+
+    def _evict_from_disk(self):
+        files = sorted(
+            (os.path.getmtime(filename), os.path.getsize(filename), filename)
+            for filename in self._filenames()
+        )
+        self.disk_bytes = sum(size for mtime, size, filename in files)
+        for mtime, size, filename in files:
+            if self.disk_bytes <= self.max_disk_bytes:
+                break
+            os.remove(filename)
+            self.disk_bytes -= size
+            self.evictions += 1
+
+
+def _content_key(*values):
+    # Returns a digest of the values. Arrays are hashed by their contents (plus
+    # dtype and shape); other values by their repr().
+    digest = hashlib.blake2b(digest_size=16)
+    for value in values:
+        if isinstance(value, np.ndarray):
+            digest.update(repr((value.dtype.str, value.shape)).encode())
+            digest.update(np.ascontiguousarray(value).reshape(-1).view(np.uint8))
+        else:
+            digest.update(repr(value).encode())
+        digest.update(b"\0")
+    return digest.digest()
@@ -0,0 +1,173 @@
+import os
+
+import numpy as np
+
+from .crop_evapotranspiration import get_kc_curve
+from .effective_precipitation import get_effective_precipitation_arrays
+from .swb import (
+    OUTPUT_COLUMNS,
+    NetIrrigation,
+    SoilWaterBalance,
+    encode_actual_net_irrigation,
+)
+
+_CROP_PARAMETERS = ("planting_date", "kc_offseason", "kc_plantingdate", "kc_stages")
+_ARROW_SUFFIXES = (".arrow", ".feather", ".ipc")
+
+# Options of calculate_soil_water() that are not supported here, because the output
+# columns are the same for all parcels.
+_UNSUPPORTED_OPTIONS = ("diagnostics", "outputs", "dtype", "cache", "timings")
+
+
+def calculate_soil_water_columnar(
+    input_path,
+    output_path,
+    *,
+    parameters,
+    parcel_column="parcel",
+    date_column="date",
+):
+    # "parameters" maps each parcel to a dictionary with its soil parameters (the
+    # arguments of calculate_soil_water() except for timeseries) and crop parameters
+    # (the arguments of calculate_crop_evapotranspiration() except for timeseries).
+    for parcel, parcel_parameters in parameters.items():
+        for name in _UNSUPPORTED_OPTIONS:
+            if name in parcel_parameters:
+                raise ValueError(
+                    "Parameter {!r} of parcel {!r} is not supported".format(
+                        name, parcel
+                    )
+                )
+    table = _read_table(input_path)
+    parcels = table.column(parcel_column).to_numpy(zero_copy_only=False)
+    dates = np.asarray(
+        table.column(date_column).to_numpy(zero_copy_only=False),
+        dtype="datetime64[D]",
+    )
+    precipitation = _float_column(table, "precipitation")
+    ref_evapotranspiration = _float_column(table, "ref_evapotranspiration")
+    irrigation_mode, irrigation_amount = _irrigation_columns(table)
+
+    # The output columns are allocated once for the entire table; each parcel's
+    # results are written to a slice of them.
+    nrows = len(table)
+    outputs = {
+        name: np.empty(nrows)
+        for name in ("effective_precipitation", "kc", "crop_evapotranspiration")
+        + OUTPUT_COLUMNS
+    }
+    states = {}
+    for parcel, start, end in _groups(parcels):
+        parcel_parameters = dict(parameters[parcel])
+        crop_parameters = {
+            name: parcel_parameters.pop(name) for name in _CROP_PARAMETERS
+        }
+        rows = slice(start, end)
+        peff = outputs["effective_precipitation"][rows]
+        peff[:] = get_effective_precipitation_arrays(
+            precipitation=precipitation[rows],
+            ref_evapotranspiration=ref_evapotranspiration[rows],
+        )
+        curve = get_kc_curve(
+            kc_offseason=crop_parameters["kc_offseason"],
+            kc_plantingdate=crop_parameters["kc_plantingdate"],
+            kc_stages=crop_parameters["kc_stages"],
+        )
+        day_offsets = (
+            dates[rows] - np.datetime64(crop_parameters["planting_date"], "D")
+        ).astype(int)
+        kc = outputs["kc"][rows]
+        kc[:] = curve.kc(day_offsets)
+        etc = outputs["crop_evapotranspiration"][rows]
+        np.multiply(ref_evapotranspiration[rows], kc, out=etc)
+        model = SoilWaterBalance(timeseries=None, **parcel_parameters)
+        model._calculate_arrays(
+            peff,
+            etc,
+            irrigation_mode[rows],
+            irrigation_amount[rows],
+            out={name: outputs[name][rows] for name in OUTPUT_COLUMNS},
+        )
+        states[parcel] = {"raw": model.raw, "taw": model.taw, "state": model.state}
+
+    for name, values in outputs.items():
+        table = table.append_column(name, _pyarrow().array(values))
+    _write_table(table, output_path)
+    return states
+
+
+def _pyarrow():
+    import pyarrow
+
+    return pyarrow
+
+
+def _is_arrow_file(path):
+    return os.path.splitext(str(path))[1].lower() in _ARROW_SUFFIXES
+
+
+def _read_table(path):
+    # Arrow IPC files are memory mapped, so reading them does not copy the data;
+    # Parquet files are memory mapped but need decoding.
+    pa = _pyarrow()
+    if _is_arrow_file(path):
+        with pa.memory_map(str(path)) as source:
+            return pa.ipc.open_file(source).read_all()
+    import pyarrow.parquet
+
+    return pyarrow.parquet.read_table(path, memory_map=True)
+
+
+def _write_table(table, path):
+    pa = _pyarrow()
+    if _is_arrow_file(path):
+        with pa.OSFile(str(path), "wb") as sink:
+            with pa.ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+        return
+    import pyarrow.parquet
+
+    pyarrow.parquet.write_table(table, path)
+
+
+def _float_column(table, name):
+    column = table.column(name)
+    if column.num_chunks == 1 and column.null_count == 0:
+        values = column.chunk(0).to_numpy()
+    else:
+        values = column.to_numpy(zero_copy_only=False)
+    return np.asarray(values, dtype=float)
+
+
+def _irrigation_columns(table):
+    # Like swb._get_actual_net_irrigation(), but for an arrow table
+    if "actual_net_irrigation_mode" in table.column_names:
+        return encode_actual_net_irrigation(
+            NetIrrigation(
+                table.column("actual_net_irrigation_mode").to_numpy(),
+                _float_column(table, "actual_net_irrigation_amount"),
+            )
+        )
+    return encode_actual_net_irrigation(
+        table.column("actual_net_irrigation").to_numpy(zero_copy_only=False)
+    )
+
+
+def _groups(parcels):
+    # Yields (parcel, start, end) for each group of consecutive rows of a parcel
+    if len(parcels) == 0:
+        return
+    boundaries = np.flatnonzero(parcels[1:] != parcels[:-1]) + 1
+    starts = np.concatenate([[0], boundaries])
+    ends = np.concatenate([boundaries, [len(parcels)]])
+    seen = set()
+    for start, end in zip(starts.tolist(), ends.tolist()):
+        parcel = parcels[start]
+        if isinstance(parcel, np.generic):
+            parcel = parcel.item()
+        if parcel in seen:
+            raise ValueError(
+                "The rows of parcel {!r} are not consecutive".format(parcel)
+            )
+        seen.add(parcel)
+        yield parcel, start, end
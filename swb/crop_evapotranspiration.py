@@ -1,13 +1,16 @@
-import datetime as dt
 from collections import namedtuple
+from functools import lru_cache
 
 import numpy as np
 
+from .cache import _content_key
+from .result import Result
+
 KcStage = namedtuple("KcStage", ("ndays", "kc_end"))
 
 
 def calculate_crop_evapotranspiration(
-    *, timeseries, planting_date, kc_offseason, kc_plantingdate, kc_stages
+    *, timeseries, planting_date, kc_offseason, kc_plantingdate, kc_stages, cache=None
 ):
     model = CropEvapotranspiration(
         timeseries=timeseries,
@@ -15,40 +18,227 @@ def calculate_crop_evapotranspiration(
         kc_offseason=kc_offseason,
         kc_plantingdate=kc_plantingdate,
         kc_stages=kc_stages,
+        cache=cache,
     )
     model.calculate()
 
 
+def calculate_crop_evapotranspiration_result(
+    *, timeseries, planting_date, kc_offseason, kc_plantingdate, kc_stages, cache=None
+):
+    model = CropEvapotranspiration(
+        timeseries=timeseries,
+        planting_date=planting_date,
+        kc_offseason=kc_offseason,
+        kc_plantingdate=kc_plantingdate,
+        kc_stages=kc_stages,
+        cache=cache,
+    )
+    return Result(timeseries.index, model.calculate_arrays())
+
+
+def calculate_crop_evapotranspiration_arrays(
+    *, ref_evapotranspiration, day_offsets, kc_offseason, kc_plantingdate, kc_stages
+):
+    curve = get_kc_curve(
+        kc_offseason=kc_offseason,
+        kc_plantingdate=kc_plantingdate,
+        kc_stages=kc_stages,
+    )
+    kc = curve.kc(day_offsets)
+    return {
+        "kc": kc,
+        "crop_evapotranspiration": np.asarray(ref_evapotranspiration, dtype=float) * kc,
+    }
+
+
+def calculate_crop_evapotranspiration_matrix(
+    *,
+    ref_evapotranspiration,
+    dates,
+    planting_dates,
+    kc_offseason,
+    kc_plantingdate,
+    kc_stages,
+):
+    planting_days = np.asarray(planting_dates, dtype="datetime64[D]")
+    offsets = (_days(dates)[np.newaxis, :] - planting_days[:, np.newaxis]).astype(int)
+    return calculate_crop_evapotranspiration_arrays(
+        ref_evapotranspiration=ref_evapotranspiration,
+        day_offsets=offsets,
+        kc_offseason=kc_offseason,
+        kc_plantingdate=kc_plantingdate,
+        kc_stages=kc_stages,
+    )
+
+
 class CropEvapotranspiration(object):
     def __init__(self, **kwargs):
         for arg in kwargs:
             setattr(self, arg, kwargs[arg])
 
     def calculate(self):
-        self.timeseries["kc"] = self.kc_offseason
-        prev_kc = self.kc_plantingdate
-        days_done = 0
+        result = self.calculate_arrays()
+        self.timeseries["kc"] = result["kc"]
+        self.timeseries["crop_evapotranspiration"] = result["crop_evapotranspiration"]
+
+    def calculate_arrays(self):
+        curve = get_kc_curve(
+            kc_offseason=self.kc_offseason,
+            kc_plantingdate=self.kc_plantingdate,
+            kc_stages=self.kc_stages,
+        )
+        cache = getattr(self, "cache", None)
+        if cache is None:
+            return curve.calculate_arrays(self.timeseries, self.planting_date)
+        key = _content_key(
+            "CropEvapotranspiration",
+            curve.kc_offseason,
+            curve.kc_plantingdate,
+            curve.kc_stages,
+            np.datetime64(self.planting_date, "D"),
+            _days(self.timeseries.index),
+            self.timeseries["ref_evapotranspiration"].to_numpy(dtype=float),
+        )
+        result = cache.get(key)
+        if result is None:
+            result = curve.calculate_arrays(self.timeseries, self.planting_date)
+            cache.put(key, result)
+        return result
+
+
+def get_kc_curve(*, kc_offseason, kc_plantingdate, kc_stages):
+    return _get_kc_curve(
+        kc_offseason, kc_plantingdate, tuple(KcStage(*stage) for stage in kc_stages)
+    )
+
+
+@lru_cache(maxsize=1024)
+def _get_kc_curve(kc_offseason, kc_plantingdate, kc_stages):
+    return KcCurve(
+        kc_offseason=kc_offseason,
+        kc_plantingdate=kc_plantingdate,
+        kc_stages=kc_stages,
+    )
+
+
+class KcCurve(object):
+    def __init__(self, *, kc_offseason, kc_plantingdate, kc_stages):
+        self.kc_offseason = kc_offseason
+        self.kc_plantingdate = kc_plantingdate
+        self.kc_stages = tuple(KcStage(*stage) for stage in kc_stages)
+
+        # self.kcs[i] is the kc i days after planting. Since curves are shared through
+        # get_kc_curve()'s cache, it is read-only.
+        kcs = [np.zeros(0)]
+        prev_kc = kc_plantingdate
         for stage in self.kc_stages:
-            self._calculate_stage(stage, prev_kc, days_done)
-            days_done += stage.ndays
+            kcs.append(np.linspace(prev_kc, stage.kc_end, num=stage.ndays + 1)[1:])
             prev_kc = stage.kc_end
-        self.timeseries["crop_evapotranspiration"] = (
-            self.timeseries["ref_evapotranspiration"] * self.timeseries["kc"]
+        self.kcs = np.concatenate(kcs)
+        self.kcs.setflags(write=False)
+
+    def kc(self, day_offsets):
+        # "day_offsets" is an array with the number of days after planting
+        day_offsets = np.asarray(day_offsets)
+        result = np.full(day_offsets.shape, self.kc_offseason, dtype=float)
+        in_season = (day_offsets >= 0) & (day_offsets < len(self.kcs))
+        result[in_season] = self.kcs[day_offsets[in_season]]
+        return result
+
+    def calculate(self, timeseries, planting_date):
+        result = self.calculate_arrays(timeseries, planting_date)
+        timeseries["kc"] = result["kc"]
+        timeseries["crop_evapotranspiration"] = result["crop_evapotranspiration"]
+
+    def calculate_arrays(self, timeseries, planting_date):
+        kc = self.kc(_day_offsets(timeseries.index, planting_date))
+        return {
+            "kc": kc,
+            "crop_evapotranspiration": (
+                timeseries["ref_evapotranspiration"].to_numpy(dtype=float) * kc
+            ),
+        }
+
+
+class KcCalendar(object):
+    def __init__(self, seasons):
+        # "seasons" is a sequence of (planting_date, crop) tuples, where crop is a
+        # KcCurve or a mapping with kc_offseason, kc_plantingdate and kc_stages.
+        seasons = sorted(
+            (
+                (np.datetime64(planting_date, "D"), _as_kc_curve(crop))
+                for planting_date, crop in seasons
+            ),
+            key=lambda season: season[0],
+        )
+        if not seasons:
+            raise ValueError("A KcCalendar needs at least one season")
+        self.planting_dates = np.array(
+            [planting_date for planting_date, curve in seasons], dtype="datetime64[D]"
+        )
+        if (np.diff(self.planting_dates) == np.timedelta64(0, "D")).any():
+            raise ValueError("Two seasons of a KcCalendar have the same planting date")
+        self.curves = tuple(curve for planting_date, curve in seasons)
+
+        # The kcs of all curves are concatenated, so that the kc of any day of any
+        # season can be looked up at once.
+        self._lengths = np.array([len(curve.kcs) for curve in self.curves])
+        self._starts = np.concatenate([[0], np.cumsum(self._lengths)[:-1]])
+        self._kcs = np.concatenate([curve.kcs for curve in self.curves])
+        self._kc_offseason = np.array(
+            [curve.kc_offseason for curve in self.curves], dtype=float
         )
 
-    def _calculate_stage(self, stage, kc_start, days_done):
-        start_date = self.planting_date + dt.timedelta(days=days_done)
-        end_date = self.planting_date + dt.timedelta(days=days_done + stage.ndays - 1)
-        start = self._date_to_timestamp(start_date)
-        end = self._date_to_timestamp(end_date)
-        kcs = np.linspace(kc_start, stage.kc_end, num=stage.ndays + 1)[1:]
-        period_length = len(self.timeseries.loc[start:end, "kc"])
-        kcs = kcs[:period_length]
-        self.timeseries.loc[start:end, "kc"] = kcs
-
-    def _date_to_timestamp(self, date):
-        try:
-            time = self.timeseries.index[0].timetz()
-        except IndexError:
-            time = dt.time(0, 0, tzinfo=getattr(self.timeseries.index, "tz", None))
-        return dt.datetime.combine(date, time)
+    def kc(self, dates):
+        # Each day belongs to the season with the latest planting date on or before
+        # it (days before the first planting date belong to the first season).
+        days = _days(dates)
+        season = np.maximum(
+            np.searchsorted(self.planting_dates, days, side="right") - 1, 0
+        )
+        offsets = (days - self.planting_dates[season]).astype(int)
+        in_season = (offsets >= 0) & (offsets < self._lengths[season])
+        result = self._kc_offseason[season]
+        result[in_season] = self._kcs[
+            self._starts[season[in_season]] + offsets[in_season]
+        ]
+        return result
+
+    def calculate(self, timeseries):
+        result = self.calculate_arrays(timeseries)
+        timeseries["kc"] = result["kc"]
+        timeseries["crop_evapotranspiration"] = result["crop_evapotranspiration"]
+
+    def calculate_arrays(self, timeseries):
+        kc = self.kc(timeseries.index)
+        return {
+            "kc": kc,
+            "crop_evapotranspiration": (
+                timeseries["ref_evapotranspiration"].to_numpy(dtype=float) * kc
+            ),
+        }
+
+
+def _as_kc_curve(crop):
+    if isinstance(crop, KcCurve):
+        return crop
+    return get_kc_curve(
+        kc_offseason=crop["kc_offseason"],
+        kc_plantingdate=crop["kc_plantingdate"],
+        kc_stages=crop["kc_stages"],
+    )
+
+
+def _day_offsets(index, planting_date):
+    # Returns an array with the number of days from planting to each item of the index
+    return (_days(index) - np.datetime64(planting_date, "D")).astype(int)
+
+
+def _days(index):
+    # Returns the dates of the index (in its own time zone, if aware) as datetime64[D]
+    if len(index) == 0:
+        return np.zeros(0, dtype="datetime64[D]")
+    if getattr(index, "tz", None) is not None:
+        index = index.tz_localize(None)
+    return np.asarray(index, dtype="datetime64[D]")
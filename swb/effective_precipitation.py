@@ -1,7 +1,29 @@
 import numpy as np
 
+from .result import Result
+
 
 def get_effective_precipitation(timeseries):
-    e = timeseries["ref_evapotranspiration"]
-    p = timeseries["precipitation"]
-    timeseries["effective_precipitation"] = np.where(p >= 0.2 * e, p * 0.8, 0.0)
+    timeseries["effective_precipitation"] = _get_effective_precipitation(timeseries)
+
+
+def get_effective_precipitation_result(timeseries):
+    return Result(
+        timeseries.index,
+        {"effective_precipitation": _get_effective_precipitation(timeseries)},
+    )
+
+
+def _get_effective_precipitation(timeseries):
+    return get_effective_precipitation_arrays(
+        precipitation=timeseries["precipitation"].to_numpy(dtype=float),
+        ref_evapotranspiration=timeseries["ref_evapotranspiration"].to_numpy(
+            dtype=float
+        ),
+    )
+
+
+def get_effective_precipitation_arrays(*, precipitation, ref_evapotranspiration):
+    p = np.asarray(precipitation, dtype=float)
+    e = np.asarray(ref_evapotranspiration, dtype=float)
+    return np.where(p >= 0.2 * e, p * 0.8, 0.0)
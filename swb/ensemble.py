@@ -0,0 +1,67 @@
+import numpy as np
+
+from .batch import _PARAMETERS, _days_by_fields, _run_batch
+from .swb import encode_actual_net_irrigation
+
+
+def calculate_soil_water_ensemble(
+    *,
+    effective_precipitation,
+    crop_evapotranspiration,
+    actual_net_irrigation=0.0,
+    initial_state=None,
+    outputs=("recommended_net_irrigation", "theta", "ks"),
+    percentiles=(10, 50, 90),
+    member_outputs=(),
+    backend="auto",
+    **kwargs,
+):
+    # The time series are (members x days) arrays, or one-dimensional arrays when
+    # shared by all members. All members start from the same state. The statistics
+    # are calculated across members, for each day.
+    effective_precipitation = np.asarray(effective_precipitation, dtype=float)
+    crop_evapotranspiration = np.asarray(crop_evapotranspiration, dtype=float)
+    irrigation_mode, irrigation_amount = encode_actual_net_irrigation(
+        actual_net_irrigation
+    )
+    ndays = effective_precipitation.shape[-1]
+    nmembers = np.broadcast_shapes(
+        effective_precipitation.shape[:-1],
+        crop_evapotranspiration.shape[:-1],
+        irrigation_mode.shape[:-1],
+        (1,),
+    )[0]
+    if initial_state is not None:
+        kwargs["theta_init"] = initial_state.theta
+    params = {
+        name: np.full(nmembers, kwargs[name], dtype=float) for name in _PARAMETERS
+    }
+    initial_dr = None
+    if initial_state is not None:
+        initial_dr = np.full(nmembers, initial_state.dr, dtype=float)
+    members = _run_batch(
+        params,
+        effective_precipitation=_days_by_fields(
+            effective_precipitation, nmembers, ndays
+        ),
+        crop_evapotranspiration=_days_by_fields(
+            crop_evapotranspiration, nmembers, ndays
+        ),
+        irrigation_mode=_days_by_fields(irrigation_mode, nmembers, ndays),
+        irrigation_amount=_days_by_fields(irrigation_amount, nmembers, ndays),
+        backend=backend,
+        initial_dr=initial_dr,
+    )
+
+    # The member arrays are (days x members)
+    raw = members["raw"][0]
+    return {
+        "raw": raw,
+        "taw": members["taw"][0],
+        "mean": {name: members[name].mean(axis=1) for name in outputs},
+        "percentiles": {
+            name: np.percentile(members[name], percentiles, axis=1) for name in outputs
+        },
+        "exceeds_raw_probability": (members["dr"] > raw).mean(axis=1),
+        "members": {name: members[name].T for name in member_outputs},
+    }
@@ -0,0 +1,100 @@
+import numpy as np
+
+from .batch import _PARAMETERS, _run_batch
+from .swb import OUTPUT_COLUMNS, encode_actual_net_irrigation
+
+
+def calculate_soil_water_grid(
+    *,
+    effective_precipitation,
+    crop_evapotranspiration,
+    actual_net_irrigation=0.0,
+    nodata_mask=None,
+    chunks=None,
+    backend="auto",
+    **kwargs,
+):
+    # The time series are (time x y x x) stacks; the parameters in kwargs are (y x x)
+    # rasters or scalars. nodata_mask is a (y x x) boolean raster which is True where
+    # there is no data; these pixels are not calculated and are NaN in the result.
+    # "chunks" is an optional (y, x) tile size.
+    ntimes, ny, nx = np.shape(effective_precipitation)
+    if nodata_mask is None:
+        nodata_mask = np.zeros((ny, nx), dtype=bool)
+    chunk_y, chunk_x = chunks or (ny, nx)
+    result = {name: np.full((ntimes, ny, nx), np.nan) for name in OUTPUT_COLUMNS}
+    result["raw"] = np.full((ny, nx), np.nan)
+    result["taw"] = np.full((ny, nx), np.nan)
+    irrigation = encode_actual_net_irrigation(actual_net_irrigation)
+    for y in range(0, ny, chunk_y):
+        for x in range(0, nx, chunk_x):
+            tile = (slice(y, y + chunk_y), slice(x, x + chunk_x))
+            _calculate_tile(
+                result,
+                tile,
+                ~np.asarray(nodata_mask[tile], dtype=bool),
+                effective_precipitation,
+                crop_evapotranspiration,
+                irrigation,
+                kwargs,
+                backend,
+            )
+    return result
+
+
+def _calculate_tile(
+    result,
+    tile,
+    valid,
+    effective_precipitation,
+    crop_evapotranspiration,
+    irrigation,
+    params,
+    backend,
+):
+    nvalid = np.count_nonzero(valid)
+    if not nvalid:
+        return
+    ntimes = np.shape(effective_precipitation)[0]
+    irrigation_mode, irrigation_amount = (
+        _tile_pixels(a, tile, valid) for a in irrigation
+    )
+    tile_result = _run_batch(
+        {
+            name: np.broadcast_to(
+                _raster_pixels(params[name], tile, valid), (nvalid,)
+            ).astype(float)
+            for name in _PARAMETERS
+        },
+        effective_precipitation=np.asarray(
+            _tile_pixels(effective_precipitation, tile, valid), dtype=float
+        ),
+        crop_evapotranspiration=np.asarray(
+            _tile_pixels(crop_evapotranspiration, tile, valid), dtype=float
+        ),
+        irrigation_mode=np.broadcast_to(irrigation_mode, (ntimes, nvalid)),
+        irrigation_amount=np.broadcast_to(irrigation_amount, (ntimes, nvalid)),
+        backend=backend,
+    )
+    for name in OUTPUT_COLUMNS:
+        result[name][(slice(None),) + tile][:, valid] = tile_result[name]
+    for name in ("raw", "taw"):
+        result[name][tile][valid] = tile_result[name]
+
+
+def _tile_pixels(a, tile, valid):
+    # Returns a (time x valid pixels) array from a (time x y x x) stack; other arrays
+    # (scalars or one item per time) are returned so that they can be broadcast.
+    a = np.asarray(a)
+    if a.ndim == 3:
+        return a[(slice(None),) + tile][:, valid]
+    if a.ndim == 1:
+        return a[:, np.newaxis]
+    return a
+
+
+def _raster_pixels(a, tile, valid):
+    a = np.asarray(a)
+    if a.ndim == 2:
+        return a[tile][valid]
+    return a
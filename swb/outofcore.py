@@ -0,0 +1,72 @@
+import os
+
+import numpy as np
+
+from .batch import calculate_soil_water_batch
+from .swb import OUTPUT_COLUMNS, NetIrrigation
+
+# The approximate memory used for each cell and day of a block: contiguous copies of
+# the two input time series and the five float64 outputs, plus about 18 bytes if
+# actual_net_irrigation is a (cells x days) array, which is encoded and copied.
+_BYTES_PER_CELL_DAY = 80
+
+
+def calculate_soil_water_memmap(
+    *,
+    output_dir,
+    effective_precipitation,
+    crop_evapotranspiration,
+    actual_net_irrigation=0.0,
+    block_size=None,
+    max_memory_bytes=256 * 2**20,
+    **kwargs,
+):
+    # The inputs are (cells x days) arrays, normally memory mapped (e.g. opened with
+    # np.load(..., mmap_mode="r") or np.memmap()). The cells are processed in blocks
+    # of block_size, so memory usage depends on block_size and not on the number of
+    # cells; by default, the block size is such that a block uses about
+    # max_memory_bytes. The outputs are written to memory mapped .npy files in
+    # output_dir.
+    ncells, ndays = effective_precipitation.shape
+    if block_size is None:
+        block_size = max(1, max_memory_bytes // (_BYTES_PER_CELL_DAY * ndays))
+    os.makedirs(output_dir, exist_ok=True)
+    result = {
+        name: np.lib.format.open_memmap(
+            os.path.join(output_dir, name + ".npy"),
+            mode="w+",
+            dtype=float,
+            shape=(ncells, ndays),
+        )
+        for name in OUTPUT_COLUMNS
+    }
+    result["raw"] = np.empty(ncells)
+    result["taw"] = np.empty(ncells)
+    for start in range(0, ncells, block_size):
+        cells = slice(start, min(start + block_size, ncells))
+        block_result = calculate_soil_water_batch(
+            effective_precipitation=effective_precipitation[cells],
+            crop_evapotranspiration=crop_evapotranspiration[cells],
+            actual_net_irrigation=_block_irrigation(actual_net_irrigation, cells),
+            **{
+                name: value[cells] if np.ndim(value) else value
+                for name, value in kwargs.items()
+            },
+        )
+        for name in OUTPUT_COLUMNS + ("raw", "taw"):
+            result[name][cells] = block_result[name]
+    for name in OUTPUT_COLUMNS:
+        result[name].flush()
+    return result
+
+
+def _block_irrigation(actual_net_irrigation, cells):
+    # The arrays of a NetIrrigation are sliced separately rather than encoded for all
+    # cells at once, which would read them entirely into memory.
+    if isinstance(actual_net_irrigation, NetIrrigation):
+        return NetIrrigation(
+            *(_block_irrigation(a, cells) for a in actual_net_irrigation)
+        )
+    if np.ndim(actual_net_irrigation) == 2:
+        return actual_net_irrigation[cells]
+    return actual_net_irrigation
@@ -0,0 +1,175 @@
+import os
+from itertools import islice
+
+import numpy as np
+
+from .swb import DIAGNOSTIC_COLUMNS, SoilWaterBalance, _get_actual_net_irrigation
+
+# Each job occupies a block of float64 rows in its chunk's shared memory: four input
+# time series (effective precipitation, crop evapotranspiration, irrigation mode,
+# irrigation amount) followed by the job's output time series.
+_NINPUTS = 4
+
+# Options of calculate_soil_water() that are not supported here, because the workers
+# would each get a copy of the object and discard it.
+_UNSUPPORTED_OPTIONS = ("cache", "timings")
+
+
+def calculate_soil_water_parallel(jobs, *, workers=None, chunksize=16, ordered=True):
+    """Run calculate_soil_water() for many jobs on a process pool.
+
+    Each job is a dictionary with the arguments of calculate_soil_water(). The
+    results are yielded as they become available; if "ordered" is False they may
+    be yielded in a different order than that of the jobs. Each result is the
+    same as what calculate_soil_water() would return for the job (and, likewise,
+    the job's timeseries gets the output columns).
+    """
+    # concurrent.futures and multiprocessing are imported only when needed, because
+    # importing them slows down "import swb".
+    from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+    workers = workers or os.cpu_count() or 1
+    jobs = iter(jobs)
+    max_pending = 2 * workers
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        pending = {}
+        done_chunks = {}
+        next_chunk_to_submit = 0
+        next_chunk_to_yield = 0
+        try:
+            while True:
+                while len(pending) < max_pending:
+                    chunk = list(islice(jobs, chunksize))
+                    if not chunk:
+                        break
+                    future, shm = _submit_chunk(executor, chunk)
+                    pending[future] = (next_chunk_to_submit, chunk, shm)
+                    next_chunk_to_submit += 1
+                if not pending:
+                    break
+                finished, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    chunk_number, chunk, shm = pending.pop(future)
+                    try:
+                        states = future.result()
+                        done_chunks[chunk_number] = _collect_chunk(chunk, states, shm)
+                    finally:
+                        shm.close()
+                        shm.unlink()
+                if ordered:
+                    while next_chunk_to_yield in done_chunks:
+                        yield from done_chunks.pop(next_chunk_to_yield)
+                        next_chunk_to_yield += 1
+                else:
+                    for chunk_number in list(done_chunks):
+                        yield from done_chunks.pop(chunk_number)
+        finally:
+            # If the generator is closed early or a chunk fails, the chunks that
+            # are still pending are abandoned; their shared memory must be freed.
+            for future, (_, _, shm) in pending.items():
+                future.cancel()
+                shm.close()
+                shm.unlink()
+
+
+def _submit_chunk(executor, chunk):
+    from multiprocessing import shared_memory
+
+    for job in chunk:
+        for name in _UNSUPPORTED_OPTIONS:
+            if name in job:
+                raise ValueError(
+                    "calculate_soil_water_parallel() does not support {!r}".format(name)
+                )
+    lengths = [len(job["timeseries"]) for job in chunk]
+    models = [SoilWaterBalance(**job) for job in chunk]
+    size = sum(
+        (_NINPUTS + len(_output_columns(model))) * length
+        for model, length in zip(models, lengths)
+    )
+    shm = shared_memory.SharedMemory(create=True, size=max(1, 8 * size))
+    try:
+        for job, block in zip(chunk, _job_blocks(shm, models, lengths)):
+            timeseries = job["timeseries"]
+            block[0] = timeseries["effective_precipitation"].to_numpy(dtype=float)
+            block[1] = timeseries["crop_evapotranspiration"].to_numpy(dtype=float)
+            block[2], block[3] = _get_actual_net_irrigation(timeseries)
+        del block
+        params = [
+            {key: value for key, value in job.items() if key != "timeseries"}
+            for job in chunk
+        ]
+        future = executor.submit(_run_chunk, shm.name, params, lengths)
+    except BaseException:
+        shm.close()
+        shm.unlink()
+        raise
+    return future, shm
+
+
+def _collect_chunk(chunk, states, shm):
+    results = []
+    lengths = [len(job["timeseries"]) for job in chunk]
+    models = [SoilWaterBalance(**job) for job in chunk]
+    blocks = _job_blocks(shm, models, lengths)
+    for job, model, block, state in zip(chunk, models, blocks, states):
+        timeseries = job["timeseries"]
+        for i, name in enumerate(_output_columns(model)):
+            timeseries[name] = block[_NINPUTS + i].astype(model.dtype)
+        results.append(
+            {
+                "raw": model.raw,
+                "taw": model.taw,
+                "timeseries": timeseries,
+                "state": state,
+            }
+        )
+    return results
+
+
+def _job_blocks(shm, models, lengths):
+    # Returns the block of each job; it has the input rows followed by one row for
+    # each of the model's output columns.
+    blocks = []
+    offset = 0
+    for model, length in zip(models, lengths):
+        nrows = _NINPUTS + len(_output_columns(model))
+        blocks.append(
+            np.ndarray((nrows, length), dtype=float, buffer=shm.buf, offset=8 * offset)
+        )
+        offset += nrows * length
+    return blocks
+
+
+def _run_chunk(shm_name, params, lengths):
+    # This runs in the worker process. Since the worker processes are reused, swb is
+    # imported only once per worker.
+    from multiprocessing import shared_memory
+
+    shm = shared_memory.SharedMemory(name=shm_name)
+    try:
+        models = [SoilWaterBalance(timeseries=None, **job) for job in params]
+        return _calculate_chunk(models, _job_blocks(shm, models, lengths))
+    finally:
+        shm.close()
+
+
+def _calculate_chunk(models, blocks):
+    # The blocks are released when this returns, so that the shared memory can then
+    # be closed.
+    states = []
+    for model, block in zip(models, blocks):
+        result = model._calculate(
+            block[0],
+            block[1],
+            block[2].astype(np.int8),
+            block[3],
+        )
+        for i, name in enumerate(_output_columns(model)):
+            block[_NINPUTS + i] = result[name]
+        states.append(model.state)
+    return states
+
+
+def _output_columns(model):
+    return model.outputs + (DIAGNOSTIC_COLUMNS if model.diagnostics else ())
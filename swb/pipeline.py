@@ -0,0 +1,62 @@
+import numpy as np
+
+from .crop_evapotranspiration import _days, get_kc_curve
+from .effective_precipitation import get_effective_precipitation_arrays
+from .swb import calculate_soil_water_arrays
+
+INTERMEDIATE_OUTPUTS = ("effective_precipitation", "kc", "crop_evapotranspiration")
+
+
+def calculate_soil_water_pipeline(
+    *,
+    precipitation,
+    ref_evapotranspiration,
+    dates,
+    planting_date,
+    kc_offseason,
+    kc_plantingdate,
+    kc_stages,
+    actual_net_irrigation=0.0,
+    intermediate_outputs=(),
+    **kwargs,
+):
+    # Effective precipitation, Kc and crop evapotranspiration are calculated as
+    # temporary arrays that are passed straight to the soil water balance; they are
+    # only returned if they are in "intermediate_outputs". The rest of the keyword
+    # arguments are those of calculate_soil_water_arrays().
+    for name in intermediate_outputs:
+        if name not in INTERMEDIATE_OUTPUTS:
+            raise ValueError(
+                "Unknown intermediate output {!r}; should be one of {}".format(
+                    name, ", ".join(INTERMEDIATE_OUTPUTS)
+                )
+            )
+    ref_evapotranspiration = np.asarray(ref_evapotranspiration, dtype=float)
+    effective_precipitation = get_effective_precipitation_arrays(
+        precipitation=precipitation, ref_evapotranspiration=ref_evapotranspiration
+    )
+    curve = get_kc_curve(
+        kc_offseason=kc_offseason,
+        kc_plantingdate=kc_plantingdate,
+        kc_stages=kc_stages,
+    )
+    kc = curve.kc((_days(dates) - np.datetime64(planting_date, "D")).astype(int))
+    if "kc" in intermediate_outputs:
+        crop_evapotranspiration = ref_evapotranspiration * kc
+    else:
+        # Kc is not needed afterwards, so its array is reused
+        crop_evapotranspiration = np.multiply(ref_evapotranspiration, kc, out=kc)
+    result = calculate_soil_water_arrays(
+        effective_precipitation=effective_precipitation,
+        crop_evapotranspiration=crop_evapotranspiration,
+        actual_net_irrigation=actual_net_irrigation,
+        **kwargs,
+    )
+    intermediates = {
+        "effective_precipitation": effective_precipitation,
+        "kc": kc,
+        "crop_evapotranspiration": crop_evapotranspiration,
+    }
+    for name in intermediate_outputs:
+        result[name] = intermediates[name]
+    return result
@@ -0,0 +1,35 @@
+from collections.abc import Mapping
+
+
+class Result(Mapping):
+    """The output time series of a calculation, without modifying its input.
+
+    It is a read-only mapping from the names of the output time series to arrays
+    with one item per day; "index" is the index of the input dataframe. Other
+    results of the calculation (such as raw and taw) are attributes.
+    """
+
+    def __init__(self, index, timeseries, **attributes):
+        self.index = index
+        self._timeseries = timeseries
+        for name, value in attributes.items():
+            setattr(self, name, value)
+
+    def __getitem__(self, name):
+        return self._timeseries[name]
+
+    def __iter__(self):
+        return iter(self._timeseries)
+
+    def __len__(self):
+        return len(self._timeseries)
+
+    def __repr__(self):
+        return "<Result: {}>".format(", ".join(self._timeseries))
+
+    def to_frame(self):
+        # The dataframe columns share memory with the arrays; pandas is imported only
+        # here because it is optional.
+        import pandas as pd
+
+        return pd.DataFrame(self._timeseries, index=self.index, copy=False)
@@ -0,0 +1,160 @@
+import numpy as np
+
+from .batch import _PARAMETERS, _days_by_fields, _run_batch
+from .swb import IRRIGATION_FC, OUTPUT_COLUMNS, calculate_soil_water_arrays
+
+
+def optimize_irrigation_schedule(
+    *,
+    effective_precipitation,
+    crop_evapotranspiration,
+    water_budget=None,
+    max_events=None,
+    amounts=("fc",),
+    window=3,
+    backend="auto",
+    **kwargs,
+):
+    # Builds the schedule chronologically. At each step it finds the first day with
+    # water stress that can still be avoided and evaluates irrigating with each of
+    # "amounts" on each of the "window" days before it. The candidates are
+    # simulated as the fields of a single batch run, which starts from the cached
+    # state at the end of the day before the earliest candidate rather than from
+    # the first day. The candidate that avoids the most stress days in the season
+    # (and, among equals, uses the least water) is added to the schedule; if there
+    # is a water budget, the one that avoids the most stress days per unit of water
+    # is added instead.
+    effective_precipitation = np.asarray(effective_precipitation, dtype=float)
+    crop_evapotranspiration = np.asarray(crop_evapotranspiration, dtype=float)
+    ndays = len(effective_precipitation)
+    params = {name: np.array([kwargs[name]], dtype=float) for name in _PARAMETERS}
+    schedule = np.zeros(ndays)
+
+    # The simulation of the current schedule; the state at the end of each day is
+    # its "theta" and "dr".
+    current = calculate_soil_water_arrays(
+        effective_precipitation=effective_precipitation,
+        crop_evapotranspiration=crop_evapotranspiration,
+        actual_net_irrigation=0.0,
+        backend=backend,
+        **kwargs,
+    )
+
+    nevents = 0
+    used = 0.0
+    start = 0
+    while max_events is None or nevents < max_events:
+        # Stress on a day depends on the depletion at the end of the previous day,
+        # so stress on day "start" can no longer be avoided.
+        stressed = np.flatnonzero(current["ks"] < 1)
+        stressed = stressed[stressed > start]
+        if not len(stressed):
+            break
+        stress_day = stressed[0]
+        first = max(start, stress_day - window)
+        candidate_amounts = list(amounts)
+        if water_budget is not None:
+            remaining = water_budget - used
+            if remaining <= 0:
+                break
+            candidate_amounts.append(remaining)
+        candidates = [
+            (day, amount)
+            for day in range(first, stress_day)
+            for amount in candidate_amounts
+        ]
+        initial_state = (
+            (current["theta"][first - 1], current["dr"][first - 1]) if first else None
+        )
+        result = _simulate(
+            params,
+            effective_precipitation[first:],
+            crop_evapotranspiration[first:],
+            start=first,
+            initial_state=initial_state,
+            candidates=candidates,
+            backend=backend,
+        )
+        columns = np.arange(len(candidates))
+        water = result["assumed_net_irrigation"][
+            [day - first for day, amount in candidates], columns
+        ]
+        avoided = (current["ks"][first:] < 1).sum() - (result["ks"] < 1).sum(axis=0)
+        feasible = (water > 0) & (avoided > 0)
+        if water_budget is not None:
+            feasible &= water <= remaining
+        if not feasible.any():
+            # Nothing helps; leave this stress period as it is and go on to the next
+            start = stress_day
+            continue
+        if water_budget is None:
+            score = avoided
+        else:
+            score = np.divide(avoided, water, out=np.zeros(len(water)), where=feasible)
+        best = next(i for i in np.lexsort((water, -score)) if feasible[i])
+        day = candidates[best][0]
+        schedule[day] = water[best]
+        for name in OUTPUT_COLUMNS:
+            current[name][first:] = result[name][:, best]
+        used += water[best]
+        nevents += 1
+        start = day + 1
+
+    result = calculate_soil_water_arrays(
+        effective_precipitation=effective_precipitation,
+        crop_evapotranspiration=crop_evapotranspiration,
+        actual_net_irrigation=schedule,
+        backend=backend,
+        **kwargs,
+    )
+    result["schedule"] = schedule
+    result["stress_days"] = int((result["ks"] < 1).sum())
+    result["total_net_irrigation"] = schedule.sum()
+    return result
+
+
+def _simulate(
+    params,
+    effective_precipitation,
+    crop_evapotranspiration,
+    *,
+    start,
+    initial_state,
+    candidates,
+    backend,
+):
+    # Simulates the days from "start" onwards, once for each candidate, as the
+    # fields of a batch. Each candidate is a (day, amount) tuple, where amount is
+    # a number or "fc"; there is no other irrigation. "initial_state" is a
+    # (theta, dr) tuple with the state at the end of the day before "start", or
+    # None to start from theta_init.
+    ndays = len(effective_precipitation)
+    ncandidates = len(candidates)
+    irrigation_mode = np.zeros((ndays, ncandidates), dtype=np.int8)
+    irrigation_amount = np.zeros((ndays, ncandidates))
+    for i, (day, amount) in enumerate(candidates):
+        if amount == "fc":
+            irrigation_mode[day - start, i] = IRRIGATION_FC
+        else:
+            irrigation_amount[day - start, i] = amount
+    params = {
+        name: np.broadcast_to(value, (ncandidates,)) for name, value in params.items()
+    }
+    initial_dr = None
+    if initial_state is not None:
+        theta, initial_dr = initial_state
+        params["theta_init"] = np.full(ncandidates, theta)
+        initial_dr = np.full(ncandidates, initial_dr)
+    return _run_batch(
+        params,
+        effective_precipitation=_days_by_fields(
+            effective_precipitation, ncandidates, ndays
+        ),
+        crop_evapotranspiration=_days_by_fields(
+            crop_evapotranspiration, ncandidates, ndays
+        ),
+        irrigation_mode=irrigation_mode,
+        irrigation_amount=irrigation_amount,
+        backend=backend,
+        initial_dr=initial_dr,
+    )
@@ -1,10 +1,84 @@
+import time
+from collections import namedtuple
+from collections.abc import Mapping
+
 import numpy as np
 
+from .cache import _content_key
+from .result import Result
+
+OUTPUT_COLUMNS = (
+    "dr",
+    "theta",
+    "ks",
+    "recommended_net_irrigation",
+    "assumed_net_irrigation",
+)
+
+# Additional columns calculated when diagnostics are requested
+DIAGNOSTIC_COLUMNS = ("ro", "dp", "dr_without_irrig")
+
+SoilWaterState = namedtuple("SoilWaterState", ("theta", "dr"))
+
+# Codes for the kind of each actual_net_irrigation record
+IRRIGATION_NUMERIC = 0
+IRRIGATION_MODEL = 1
+IRRIGATION_FC = 2
+
+# The typed representation of actual_net_irrigation: "mode" is an int8 array of
+# IRRIGATION_* codes and "amount" is a float array with the amounts, which are used
+# where the mode is IRRIGATION_NUMERIC.
+NetIrrigation = namedtuple("NetIrrigation", ("mode", "amount"))
+
 
 def calculate_soil_water(**kwargs):
     model = SoilWaterBalance(**kwargs)
     model.calculate_timeseries()
-    return {"raw": model.raw, "taw": model.taw, "timeseries": kwargs["timeseries"]}
+    return {
+        "raw": model.raw,
+        "taw": model.taw,
+        "timeseries": kwargs["timeseries"],
+        "state": model.state,
+    }
+
+
+def calculate_soil_water_arrays(
+    *, effective_precipitation, crop_evapotranspiration, actual_net_irrigation, **kwargs
+):
+    model = SoilWaterBalance(timeseries=None, **kwargs)
+    stopwatch = _Stopwatch(model.timings)
+    effective_precipitation = np.asarray(effective_precipitation, dtype=float)
+    shape = effective_precipitation.shape
+    irrigation_mode, irrigation_amount = encode_actual_net_irrigation(
+        actual_net_irrigation
+    )
+    crop_evapotranspiration = np.asarray(crop_evapotranspiration, dtype=float)
+    stopwatch.lap("input_extraction")
+    result = model._calculate(
+        effective_precipitation,
+        crop_evapotranspiration,
+        np.broadcast_to(irrigation_mode, shape),
+        np.broadcast_to(irrigation_amount, shape),
+    )
+    stopwatch.lap("recurrence")
+    result.update({"raw": model.raw, "taw": model.taw, "state": model.state})
+    return result
+
+
+def calculate_soil_water_result(**kwargs):
+    model = SoilWaterBalance(**kwargs)
+    return Result(
+        kwargs["timeseries"].index,
+        model._calculate_timeseries_arrays(_Stopwatch(model.timings)),
+        raw=model.raw,
+        taw=model.taw,
+        state=model.state,
+    )
+
+
+def calculate_soil_water_stream(items, **kwargs):
+    model = SoilWaterBalance(timeseries=None, **kwargs)
+    yield from model.iter_timeseries(items)
 
 
 class SoilWaterBalance(object):
@@ -40,37 +114,256 @@ class SoilWaterBalance(object):
         self.p = kwargs["p"]
         self.draintime = kwargs["draintime"]
         self.timeseries = kwargs["timeseries"]
-        self.theta_init = kwargs["theta_init"]
+        self.state = kwargs.get("initial_state")
+        self.theta_init = (
+            kwargs["theta_init"] if self.state is None else self.state.theta
+        )
         self.refill_factor = kwargs["refill_factor"]
+        self.backend = kwargs.get("backend", "auto")
+        self.diagnostics = kwargs.get("diagnostics", False)
+        self.timings = kwargs.get("timings")
+        self.cache = kwargs.get("cache")
+        self.outputs = tuple(kwargs.get("outputs", OUTPUT_COLUMNS))
+        self.dtype = np.dtype(kwargs.get("dtype", float))
+        for name in self.outputs:
+            if name not in OUTPUT_COLUMNS:
+                raise ValueError(
+                    "Unknown output {!r}; should be one of {}".format(
+                        name, ", ".join(OUTPUT_COLUMNS)
+                    )
+                )
 
         self.taw = (self.theta_fc - self.theta_wp) * self.zr * self.zr_factor
         self.raw = self.p * self.taw
 
     def calculate_timeseries(self):
-        # Add columns to self.timeseries
-        self.timeseries["dr"] = np.nan
-        self.timeseries["theta"] = np.nan
-        self.timeseries["ks"] = np.nan
-        self.timeseries["recommended_net_irrigation"] = np.nan
-        self.timeseries["assumed_net_irrigation"] = np.nan
-
-        # Loop and perform the calculation
-        theta_prev = self.theta_init
-        dr_prev = self.dr_from_theta(theta_prev)
-        dr_saturation = (self.theta_fc - self.theta_s) * self.zr * self.zr_factor
-        for date in self.timeseries.index:
-            row = self.timeseries.loc[date]
-            ks = self.ks(dr_prev)
-            dr_without_irrig = self.dr_without_irrig(dr_prev, theta_prev, ks, row)
+        stopwatch = _Stopwatch(self.timings)
+        result = self._calculate_timeseries_arrays(stopwatch)
+        for name in result:
+            self.timeseries[name] = result[name]
+        stopwatch.lap("output_writeback")
+
+    def _calculate_timeseries_arrays(self, stopwatch):
+        # Like calculate_timeseries(), but returns the output arrays instead of
+        # adding them to self.timeseries.
+        effective_precipitation = self.timeseries["effective_precipitation"].to_numpy(
+            dtype=float
+        )
+        crop_evapotranspiration = self.timeseries["crop_evapotranspiration"].to_numpy(
+            dtype=float
+        )
+        irrigation_mode, irrigation_amount = _get_actual_net_irrigation(self.timeseries)
+        stopwatch.lap("input_extraction")
+        result = self._calculate(
+            effective_precipitation,
+            crop_evapotranspiration,
+            irrigation_mode,
+            irrigation_amount,
+        )
+        stopwatch.lap("recurrence")
+        return result
+
+    def iter_timeseries(self, items):
+        # Each item is either a record (a mapping for a single day) or a chunk (a
+        # dataframe with consecutive days). Records are yielded as new dictionaries
+        # that also contain the output items; chunks get the output columns and are
+        # yielded. Only the state is kept between items.
+        for item in items:
+            if isinstance(item, Mapping):
+                yield self._calculate_record(item)
+            else:
+                self.timeseries = item
+                self.calculate_timeseries()
+                yield item
+
+    def _calculate_record(self, record):
+        irrigation_mode, irrigation_amount = map(
+            np.atleast_1d, _get_actual_net_irrigation(record)
+        )
+        result = self._calculate(
+            np.array([record["effective_precipitation"]], dtype=float),
+            np.array([record["crop_evapotranspiration"]], dtype=float),
+            irrigation_mode,
+            irrigation_amount,
+        )
+        output = dict(record)
+        for name in result:
+            output[name] = result[name].item()
+        return output
+
+    def _calculate(
+        self,
+        effective_precipitation,
+        crop_evapotranspiration,
+        irrigation_mode,
+        irrigation_amount,
+    ):
+        # Same as _calculate_uncached(), but uses self.cache if there is one
+        inputs = (
+            effective_precipitation,
+            crop_evapotranspiration,
+            irrigation_mode,
+            irrigation_amount,
+        )
+        if self.cache is None:
+            return self._calculate_uncached(*inputs)
+        key = _content_key(
+            "SoilWaterBalance",
+            self.theta_s,
+            self.theta_fc,
+            self.theta_wp,
+            self.zr,
+            self.zr_factor,
+            self.p,
+            self.draintime,
+            self.refill_factor,
+            tuple(self._get_initial_state()),
+            self.outputs,
+            self.dtype.str,
+            self.diagnostics,
+            *[np.asarray(x) for x in inputs],
+        )
+        result = self.cache.get(key)
+        if result is not None:
+            self.state = SoilWaterState(*result.pop("state").tolist())
+            return result
+        result = self._calculate_uncached(*inputs)
+        self.cache.put(key, dict(result, state=self.state))
+        return result
+
+    def _calculate_uncached(
+        self,
+        effective_precipitation,
+        crop_evapotranspiration,
+        irrigation_mode,
+        irrigation_amount,
+    ):
+        # Same as _calculate_arrays(), but also calculates the diagnostic arrays if
+        # they have been requested.
+        if not self.diagnostics:
+            return self._calculate_arrays(
+                effective_precipitation,
+                crop_evapotranspiration,
+                irrigation_mode,
+                irrigation_amount,
+            )
+        # The diagnostics are calculated from the full precision dr, theta and ks,
+        # whether these have been requested or not.
+        theta_init, dr_init = self._get_initial_state()
+        n = len(effective_precipitation)
+        full = self._calculate_arrays(
+            effective_precipitation,
+            crop_evapotranspiration,
+            irrigation_mode,
+            irrigation_amount,
+            out={name: np.empty(n) for name in OUTPUT_COLUMNS},
+        )
+        full.update(
+            self._calculate_diagnostics(
+                effective_precipitation,
+                crop_evapotranspiration,
+                np.concatenate([[theta_init], full["theta"][:-1]]),
+                np.concatenate([[dr_init], full["dr"][:-1]]),
+                full["ks"],
+            )
+        )
+        return {
+            name: full[name].astype(self.dtype, copy=False)
+            for name in self.outputs + DIAGNOSTIC_COLUMNS
+        }
+
+    def _calculate_diagnostics(
+        self, effective_precipitation, crop_evapotranspiration, theta_prev, dr_prev, ks
+    ):
+        # Given the soil moisture and depletion at the end of each previous day,
+        # calculates ro, dp and dr_without_irrig for all days at once. The operations
+        # are the same as in ro(), dp() and dr_without_irrig().
+        peff = effective_precipitation
+        ro = np.maximum(
+            peff + (theta_prev - self.theta_s) * self.zr * self.zr_factor, 0
+        )
+        theta = np.minimum(theta_prev, self.theta_s)
+        theta_mm = theta * self.zr * self.zr_factor
+        theta_fc_mm = self.theta_fc * self.zr * self.zr_factor
+        dp = np.maximum(theta_mm - theta_fc_mm + peff, 0) / self.draintime
+        return {
+            "ro": ro,
+            "dp": dp,
+            "dr_without_irrig": dr_prev
+            - (peff - ro)
+            + crop_evapotranspiration * ks
+            + dp,
+        }
+
+    def _calculate_arrays(
+        self,
+        effective_precipitation,
+        crop_evapotranspiration,
+        irrigation_mode,
+        irrigation_amount,
+        out=None,
+    ):
+        # Calculates the given days, starting from self.state (or from theta_init if
+        # there is no state yet), and leaves self.state at the end of the last day.
+        # Returns a dictionary with an array for each output column. If "out" is
+        # specified, it is such a dictionary whose arrays are used for the result
+        # instead of allocating new ones.
+        #
+        # This is the same calculation as that performed by the ks(), ro(), dp(),
+        # dr_without_irrig() and dr() methods, inlined and operating on plain floats
+        # for speed. The order of the floating point operations must be kept the same
+        # as in those methods, so that the results are identical.
+        from .backends import resolve_backend
+
+        if resolve_backend(self.backend) == "numba":
+            return self._calculate_arrays_compiled(
+                effective_precipitation,
+                crop_evapotranspiration,
+                irrigation_mode,
+                irrigation_amount,
+                out,
+            )
+        theta_s = self.theta_s
+        theta_fc = self.theta_fc
+        zr = self.zr
+        zr_factor = self.zr_factor
+        zr_mm = zr * zr_factor
+        p = self.p
+        draintime = self.draintime
+        refill_factor = self.refill_factor
+        taw = self.taw
+        raw = self.raw
+        theta_fc_mm = theta_fc * zr * zr_factor
+        dr_saturation = (theta_fc - theta_s) * zr * zr_factor
+        theta_prev, dr_prev = self._get_initial_state()
+
+        if out is None:
+            out = self._allocate_outputs(len(effective_precipitation))
+        dr_result = out.get("dr")
+        theta_result = out.get("theta")
+        ks_result = out.get("ks")
+        recommended_result = out.get("recommended_net_irrigation")
+        assumed_result = out.get("assumed_net_irrigation")
+        for i, (peff, etc, mode, amount) in enumerate(
+            zip(
+                effective_precipitation.tolist(),
+                crop_evapotranspiration.tolist(),
+                irrigation_mode.tolist(),
+                irrigation_amount.tolist(),
+            )
+        ):
+            ks = min((taw - dr_prev) / ((1 - p) * taw), 1)
+            ro = max(peff + (theta_prev - theta_s) * zr * zr_factor, 0)
+            theta_dp = min(theta_prev, theta_s)
+            dp = max(theta_dp * zr * zr_factor - theta_fc_mm + peff, 0) / draintime
+            dr_without_irrig = dr_prev - (peff - ro) + etc * ks + dp
             recommended_net_irrigation = (
-                dr_without_irrig * self.refill_factor
-                if dr_without_irrig > self.raw
-                else 0
+                dr_without_irrig * refill_factor if dr_without_irrig > raw else 0
             )
 
-            if row["actual_net_irrigation"] == "model":
+            if mode == IRRIGATION_MODEL:
                 assumed_net_irrigation = recommended_net_irrigation
-            elif row["actual_net_irrigation"] == "fc":
+            elif mode == IRRIGATION_FC:
                 if dr_without_irrig > 0:
                     assumed_net_irrigation = dr_without_irrig
                 elif dr_without_irrig > dr_saturation:
@@ -78,19 +371,83 @@ class SoilWaterBalance(object):
                 else:
                     assumed_net_irrigation = 0
             else:
-                assumed_net_irrigation = row["actual_net_irrigation"]
-
-            dr = self.dr(dr_without_irrig, assumed_net_irrigation)
-            theta = self.theta_from_dr(dr)
-            self.timeseries.at[date, "dr"] = dr
-            self.timeseries.at[date, "theta"] = theta
-            self.timeseries.at[date, "ks"] = ks
-            self.timeseries.at[
-                date, "recommended_net_irrigation"
-            ] = recommended_net_irrigation
-            self.timeseries.at[date, "assumed_net_irrigation"] = assumed_net_irrigation
+                assumed_net_irrigation = amount
+
+            dr = min(dr_without_irrig - assumed_net_irrigation, taw)
+            theta = theta_fc - dr / zr_mm
+            if dr_result is not None:
+                dr_result[i] = dr
+            if theta_result is not None:
+                theta_result[i] = theta
+            if ks_result is not None:
+                ks_result[i] = ks
+            if recommended_result is not None:
+                recommended_result[i] = recommended_net_irrigation
+            if assumed_result is not None:
+                assumed_result[i] = assumed_net_irrigation
             theta_prev = theta
             dr_prev = dr
+        self.state = SoilWaterState(theta=theta_prev, dr=dr_prev)
+        return out
+
+    def _calculate_arrays_compiled(
+        self,
+        effective_precipitation,
+        crop_evapotranspiration,
+        irrigation_mode,
+        irrigation_amount,
+        out,
+    ):
+        # Same as _calculate_arrays(), but with the numba backend, treating the time
+        # series as (days x fields) arrays with a single field.
+        from .backends import compiled_recurrence
+
+        if out is None:
+            out = self._allocate_outputs(len(effective_precipitation))
+        theta_prev, dr_prev = self._get_initial_state()
+        theta_state = np.array([theta_prev], dtype=float)
+        dr_state = np.array([dr_prev], dtype=float)
+        compiled_recurrence()(
+            *[
+                np.array([x], dtype=float)
+                for x in (
+                    self.theta_s,
+                    self.theta_fc,
+                    self.zr,
+                    self.zr_factor,
+                    self.p,
+                    self.draintime,
+                    self.refill_factor,
+                    self.taw,
+                    self.raw,
+                )
+            ],
+            np.asarray(effective_precipitation, dtype=float)[:, np.newaxis],
+            np.asarray(crop_evapotranspiration, dtype=float)[:, np.newaxis],
+            np.asarray(irrigation_mode)[:, np.newaxis],
+            np.asarray(irrigation_amount, dtype=float)[:, np.newaxis],
+            theta_state,
+            dr_state,
+            *[
+                (
+                    out[name][:, np.newaxis]
+                    if name in out
+                    else _discard(len(effective_precipitation))
+                )
+                for name in OUTPUT_COLUMNS
+            ],
+        )
+        self.state = SoilWaterState(theta=theta_state.item(), dr=dr_state.item())
+        return out
+
+    def _allocate_outputs(self, n):
+        # Only the requested outputs are allocated; _calculate_arrays() skips the rest
+        return {name: np.empty(n, dtype=self.dtype) for name in self.outputs}
+
+    def _get_initial_state(self):
+        if self.state is None:
+            return self.theta_init, self.dr_from_theta(self.theta_init)
+        return self.state
 
     def dr_from_theta(self, theta):
         return (self.theta_fc - theta) * self.zr * self.zr_factor
@@ -132,3 +489,70 @@ class SoilWaterBalance(object):
         result = dr_without_irrig - assumed_net_irrigation
         result = min(result, self.taw)
         return result
+
+
+def encode_actual_net_irrigation(actual_net_irrigation):
+    """Convert actual_net_irrigation to a NetIrrigation.
+
+    The input is a number, "model" or "fc", or an array-like of such values (of any
+    shape; the results have the same shape), or a NetIrrigation. The amounts are
+    zero where the mode is not IRRIGATION_NUMERIC.
+    """
+    if isinstance(actual_net_irrigation, NetIrrigation):
+        mode = np.asarray(actual_net_irrigation.mode, dtype=np.int8)
+        amount = np.asarray(actual_net_irrigation.amount, dtype=float)
+        if ((mode < IRRIGATION_NUMERIC) | (mode > IRRIGATION_FC)).any():
+            raise ValueError("Invalid irrigation mode; should be 0, 1 or 2")
+        return NetIrrigation(*np.broadcast_arrays(mode, amount))
+    values = np.asarray(actual_net_irrigation)
+    if values.dtype.kind in "biuf":
+        return NetIrrigation(
+            np.full(values.shape, IRRIGATION_NUMERIC, dtype=np.int8),
+            values.astype(float),
+        )
+    mode = np.full(values.shape, IRRIGATION_NUMERIC, dtype=np.int8)
+    mode[values == "model"] = IRRIGATION_MODEL
+    mode[values == "fc"] = IRRIGATION_FC
+    amount = np.zeros(values.shape)
+    numeric = mode == IRRIGATION_NUMERIC
+    amount[numeric] = values[numeric].astype(float)
+    return NetIrrigation(mode, amount)
+
+
+def _get_actual_net_irrigation(item):
+    # "item" is a dataframe or a record. It has either an "actual_net_irrigation"
+    # column/item, or the typed "actual_net_irrigation_mode" and
+    # "actual_net_irrigation_amount".
+    if "actual_net_irrigation_mode" in item:
+        return encode_actual_net_irrigation(
+            NetIrrigation(
+                np.asarray(item["actual_net_irrigation_mode"]),
+                np.asarray(item["actual_net_irrigation_amount"]),
+            )
+        )
+    return encode_actual_net_irrigation(np.asarray(item["actual_net_irrigation"]))
+
+
+def _discard(n):
+    # Returns a writeable (n x 1) array whose items all share the same memory; the
+    # compiled recurrence writes the outputs that have not been requested there.
+    return np.lib.stride_tricks.as_strided(np.empty(1), shape=(n, 1), strides=(0, 0))
+
+
+class _Stopwatch(object):
+    """Adds the time elapsed between laps to a dictionary of timing counters.
+
+    If the dictionary is None, it does nothing.
+    """
+
+    def __init__(self, timings):
+        self.timings = timings
+        if timings is not None:
+            self.last = time.perf_counter()
+
+    def lap(self, name):
+        if self.timings is None:
+            return
+        now = time.perf_counter()
+        self.timings[name] = self.timings.get(name, 0) + now - self.last
+        self.last = now
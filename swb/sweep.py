@@ -0,0 +1,89 @@
+import numpy as np
+
+from .batch import calculate_soil_water_batch
+
+
+def calculate_soil_water_sweep(
+    *,
+    grid=None,
+    design=None,
+    effective_precipitation,
+    crop_evapotranspiration,
+    actual_net_irrigation=0.0,
+    batch_size=1000,
+    timeseries_outputs=(),
+    **kwargs,
+):
+    # "grid" maps parameter names to sequences of values, all combinations of which
+    # are evaluated; "design" maps parameter names to equal-length sequences, each
+    # position of which is one combination. The rest of the parameters are in
+    # kwargs and are the same for all combinations.
+    parameters = _get_combinations(grid, design)
+    overlap = set(parameters) & set(kwargs)
+    if overlap:
+        raise ValueError(
+            "Parameters specified both as fixed and as varying: "
+            + ", ".join(sorted(overlap))
+        )
+    ncombinations = len(next(iter(parameters.values()))) if parameters else 1
+    ndays = np.shape(effective_precipitation)[-1]
+
+    result = {"parameters": parameters}
+    for name in (
+        "raw",
+        "taw",
+        "total_recommended_net_irrigation",
+        "total_assumed_net_irrigation",
+        "final_dr",
+        "final_theta",
+    ):
+        result[name] = np.empty(ncombinations)
+    result["stress_days"] = np.empty(ncombinations, dtype=int)
+    for name in timeseries_outputs:
+        result[name] = np.empty((ncombinations, ndays))
+
+    for start in range(0, ncombinations, batch_size):
+        end = min(start + batch_size, ncombinations)
+        batch_parameters = {
+            name: values[start:end] for name, values in parameters.items()
+        }
+        batch_result = calculate_soil_water_batch(
+            effective_precipitation=effective_precipitation,
+            crop_evapotranspiration=crop_evapotranspiration,
+            actual_net_irrigation=actual_net_irrigation,
+            **kwargs,
+            **batch_parameters,
+        )
+        n = end - start
+        result["raw"][start:end] = np.broadcast_to(batch_result["raw"], (n,))
+        result["taw"][start:end] = np.broadcast_to(batch_result["taw"], (n,))
+        result["total_recommended_net_irrigation"][start:end] = batch_result[
+            "recommended_net_irrigation"
+        ].sum(axis=1)
+        result["total_assumed_net_irrigation"][start:end] = batch_result[
+            "assumed_net_irrigation"
+        ].sum(axis=1)
+        result["stress_days"][start:end] = (batch_result["ks"] < 1).sum(axis=1)
+        if ndays:
+            result["final_dr"][start:end] = batch_result["dr"][:, -1]
+            result["final_theta"][start:end] = batch_result["theta"][:, -1]
+        else:
+            result["final_dr"][start:end] = np.nan
+            result["final_theta"][start:end] = np.nan
+        for name in timeseries_outputs:
+            result[name][start:end] = batch_result[name]
+    return result
+
+
+def _get_combinations(grid, design):
+    if grid is not None and design is not None:
+        raise ValueError("Specify either grid or design, not both")
+    if grid:
+        names = list(grid)
+        mesh = np.meshgrid(
+            *[np.asarray(grid[name], dtype=float) for name in names], indexing="ij"
+        )
+        return {name: values.ravel() for name, values in zip(names, mesh)}
+    if design is not None:
+        return {name: np.asarray(design[name], dtype=float) for name in design}
+    return {}
@@ -0,0 +1,83 @@
+import asyncio
+from concurrent.futures import ProcessPoolExecutor
+from unittest import IsolatedAsyncioTestCase
+
+import numpy as np
+
+from swb import AsyncCalculator, calculate_soil_water_arrays
+
+
+class AsyncCalculatorTestCase(IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.kwargs = {
+            "theta_s": 0.425,
+            "theta_fc": 0.287,
+            "theta_wp": 0.14,
+            "zr": 0.5,
+            "zr_factor": 1000,
+            "p": 0.5,
+            "draintime": 2.2,
+            "theta_init": 0.19,
+            "refill_factor": 0.5,
+            "effective_precipitation": np.array([0, 0, 12.5, 0, 0]),
+            "crop_evapotranspiration": np.array([4.1, 5, 5.2, 6, 6.3]),
+            "actual_net_irrigation": ["fc", 0, 0, "model", 0],
+        }
+        self.expected = calculate_soil_water_arrays(**self.kwargs)
+
+    def _assert_expected(self, result):
+        self.assertEqual(result["state"], self.expected["state"])
+        for name in ("dr", "theta", "ks", "recommended_net_irrigation"):
+            np.testing.assert_array_equal(result[name], self.expected[name])
+
+    async def test_result(self):
+        async with AsyncCalculator(max_workers=2) as calculator:
+            result = await calculator.calculate_soil_water_arrays(**self.kwargs)
+        self._assert_expected(result)
+
+    async def test_identical_requests_are_coalesced(self):
+        async with AsyncCalculator(max_workers=2) as calculator:
+            copy = dict(self.kwargs, effective_precipitation=[0, 0, 12.5, 0, 0])
+            results = await asyncio.gather(
+                calculator.calculate_soil_water_arrays(**self.kwargs),
+                calculator.calculate_soil_water_arrays(**copy),
+                calculator.calculate_soil_water_arrays(**self.kwargs),
+            )
+            stats = calculator.stats()
+        for result in results:
+            self._assert_expected(result)
+        self.assertIsNot(results[0], results[1])
+        self.assertEqual(stats["requests"], 3)
+        self.assertEqual(stats["coalesced"], 2)
+        self.assertEqual(stats["calculations"], 1)
+        self.assertEqual(stats["max_queue_depth"], 1)
+        self.assertEqual(stats["queue_depth"], 0)
+        self.assertGreater(stats["mean_latency"], 0)
+
+    async def test_different_requests_are_not_coalesced(self):
+        other = dict(self.kwargs, theta_init=0.2)
+        async with AsyncCalculator(max_workers=2) as calculator:
+            results = await asyncio.gather(
+                calculator.calculate_soil_water_arrays(**self.kwargs),
+                calculator.calculate_soil_water_arrays(**other),
+            )
+            stats = calculator.stats()
+        self._assert_expected(results[0])
+        self.assertEqual(
+            results[1]["state"], calculate_soil_water_arrays(**other)["state"]
+        )
+        self.assertEqual(stats["coalesced"], 0)
+        self.assertEqual(stats["calculations"], 2)
+        self.assertEqual(stats["max_queue_depth"], 2)
+
+    async def test_sequential_requests_are_calculated_again(self):
+        async with AsyncCalculator(max_workers=1) as calculator:
+            await calculator.calculate_soil_water_arrays(**self.kwargs)
+            await calculator.calculate_soil_water_arrays(**self.kwargs)
+            self.assertEqual(calculator.stats()["calculations"], 2)
+
+    async def test_process_pool(self):
+        with ProcessPoolExecutor(max_workers=1) as executor:
+            calculator = AsyncCalculator(executor=executor)
+            result = await calculator.calculate_soil_water_arrays(**self.kwargs)
+        self._assert_expected(result)
@@ -0,0 +1,82 @@
+import importlib.util
+from unittest import TestCase, skipUnless
+
+import numpy as np
+
+from swb import calculate_soil_water_arrays, calculate_soil_water_batch
+from swb.backends import resolve_backend
+
+HAVE_NUMBA = importlib.util.find_spec("numba") is not None
+
+
+class ResolveBackendTestCase(TestCase):
+    def test_auto(self):
+        self.assertEqual(resolve_backend("auto"), "numba" if HAVE_NUMBA else "numpy")
+
+    def test_explicit(self):
+        self.assertEqual(resolve_backend("numpy"), "numpy")
+
+    def test_unknown(self):
+        with self.assertRaises(ValueError):
+            resolve_backend("fortran")
+
+
+@skipUnless(HAVE_NUMBA, "numba is not installed")
+class NumbaBackendTestCase(TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(42)
+        self.params = {
+            "theta_s": 0.45,
+            "theta_fc": rng.uniform(0.25, 0.35, 5),
+            "theta_wp": 0.12,
+            "zr": rng.uniform(0.3, 1.5, 5),
+            "zr_factor": 1000,
+            "p": 0.5,
+            "draintime": rng.uniform(2, 30, 5),
+            "theta_init": rng.uniform(0.1, 0.5, 5),
+            "refill_factor": rng.uniform(0.5, 1, 5),
+        }
+        self.inputs = {
+            "effective_precipitation": rng.uniform(0, 1, (5, 100)) ** 8 * 120,
+            "crop_evapotranspiration": rng.uniform(0, 9, (5, 100)),
+            "actual_net_irrigation": rng.choice(
+                np.array([0, 30.0, "model", "fc"], dtype=object), (5, 100)
+            ),
+        }
+
+    def test_batch(self):
+        numpy_result = calculate_soil_water_batch(
+            backend="numpy", **self.inputs, **self.params
+        )
+        numba_result = calculate_soil_water_batch(
+            backend="numba", **self.inputs, **self.params
+        )
+        for name in ("dr", "theta", "ks", "recommended_net_irrigation"):
+            np.testing.assert_allclose(numba_result[name], numpy_result[name])
+
+    def test_single_field(self):
+        params = {
+            name: value[0] if isinstance(value, np.ndarray) else value
+            for name, value in self.params.items()
+        }
+        inputs = {name: value[0] for name, value in self.inputs.items()}
+        numpy_result = calculate_soil_water_arrays(backend="numpy", **inputs, **params)
+        numba_result = calculate_soil_water_arrays(backend="numba", **inputs, **params)
+        for name in ("dr", "theta", "ks", "assumed_net_irrigation"):
+            np.testing.assert_allclose(numba_result[name], numpy_result[name])
+        np.testing.assert_allclose(numba_result["state"], numpy_result["state"])
+
+    def test_selected_outputs(self):
+        params = {
+            name: value[0] if isinstance(value, np.ndarray) else value
+            for name, value in self.params.items()
+        }
+        inputs = {name: value[0] for name, value in self.inputs.items()}
+        numpy_result = calculate_soil_water_arrays(backend="numpy", **inputs, **params)
+        numba_result = calculate_soil_water_arrays(
+            backend="numba", outputs=("ks",), dtype=np.float32, **inputs, **params
+        )
+        self.assertEqual(set(numba_result), {"ks", "raw", "taw", "state"})
+        self.assertEqual(numba_result["ks"].dtype, np.float32)
+        np.testing.assert_allclose(numba_result["ks"], numpy_result["ks"], rtol=1e-6)
+        np.testing.assert_allclose(numba_result["state"], numpy_result["state"])
@@ -0,0 +1,95 @@
+from unittest import TestCase
+
+import numpy as np
+import pandas as pd
+
+from swb import calculate_soil_water, calculate_soil_water_batch
+
+
+class CalculateSoilWaterBatchTestCase(TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(42)
+        self.nfields = 4
+        self.ndays = 30
+        self.params = {
+            "theta_s": np.array([0.5, 0.45, 0.425, 0.5]),
+            "theta_fc": np.array([0.4, 0.3, 0.287, 0.35]),
+            "theta_wp": np.array([0.1, 0.12, 0.14, 0.11]),
+            "zr": np.array([0.95, 0.5, 0.5, 1.2]),
+            "zr_factor": 1000,
+            "p": np.array([0.5, 0.4, 0.5, 0.6]),
+            "draintime": np.array([28.6, 16.2, 2.2, 10]),
+            "theta_init": np.array([0.4, 0.2, 0.3, 0.5]),
+            "refill_factor": np.array([0.5, 1.0, 0.8, 1.0]),
+        }
+        self.effective_precipitation = (
+            rng.uniform(0, 1, (self.nfields, self.ndays)) ** 8 * 100
+        )
+        self.crop_evapotranspiration = rng.uniform(0, 8, (self.nfields, self.ndays))
+        self.actual_net_irrigation = rng.choice(
+            np.array([0, 20.5, "model", "fc"], dtype=object),
+            (self.nfields, self.ndays),
+        )
+        self.result = calculate_soil_water_batch(
+            effective_precipitation=self.effective_precipitation,
+            crop_evapotranspiration=self.crop_evapotranspiration,
+            actual_net_irrigation=self.actual_net_irrigation,
+            **self.params,
+        )
+
+    def _run_single_field(self, i):
+        timeseries = pd.DataFrame(
+            data={
+                "effective_precipitation": self.effective_precipitation[i],
+                "crop_evapotranspiration": self.crop_evapotranspiration[i],
+                "actual_net_irrigation": self.actual_net_irrigation[i],
+            },
+            index=pd.date_range("2018-03-15", periods=self.ndays),
+        )
+        params = {
+            name: value[i] if isinstance(value, np.ndarray) else value
+            for name, value in self.params.items()
+        }
+        return calculate_soil_water(timeseries=timeseries, **params)
+
+    def test_shape(self):
+        self.assertEqual(self.result["dr"].shape, (self.nfields, self.ndays))
+
+    def test_same_as_single_field(self):
+        for i in range(self.nfields):
+            single = self._run_single_field(i)
+            self.assertEqual(self.result["taw"][i], single["taw"])
+            self.assertEqual(self.result["raw"][i], single["raw"])
+            for name in (
+                "dr",
+                "theta",
+                "ks",
+                "recommended_net_irrigation",
+                "assumed_net_irrigation",
+            ):
+                np.testing.assert_array_equal(
+                    self.result[name][i], single["timeseries"][name]
+                )
+
+
+class SharedTimeseriesTestCase(TestCase):
+    def test_one_dimensional_timeseries_is_broadcast(self):
+        result = calculate_soil_water_batch(
+            theta_s=0.5,
+            theta_fc=0.4,
+            theta_wp=0.1,
+            zr=[0.5, 0.95],
+            zr_factor=1000,
+            p=0.5,
+            draintime=28.6,
+            theta_init=0.4,
+            refill_factor=0.5,
+            effective_precipitation=[0, 0, 4, 0],
+            crop_evapotranspiration=[49, 350, 3.5, 49],
+            actual_net_irrigation="model",
+        )
+        # Compare with AutoApplyIrrigationTestCase in test_swb.py
+        np.testing.assert_almost_equal(
+            result["dr"][1], [49, 199.5, 98.8, 73.9], decimal=1
+        )
+        self.assertEqual(result["dr"].shape, (2, 4))
@@ -0,0 +1,164 @@
+import datetime as dt
+import os
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from unittest import TestCase
+
+import numpy as np
+import pandas as pd
+
+from swb import (
+    KcStage,
+    ResultCache,
+    calculate_crop_evapotranspiration,
+    calculate_soil_water,
+    calculate_soil_water_arrays,
+)
+
+
+class ResultCacheTestCase(TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+
+    def test_get_missing(self):
+        cache = ResultCache()
+        self.assertIsNone(cache.get(b"key"))
+        self.assertEqual(cache.stats()["misses"], 1)
+
+    def test_get_returns_copies(self):
+        cache = ResultCache()
+        cache.put(b"key", {"a": np.zeros(3)})
+        cache.get(b"key")["a"][0] = 42
+        np.testing.assert_array_equal(cache.get(b"key")["a"], np.zeros(3))
+        self.assertEqual(cache.stats()["memory_hits"], 2)
+
+    def test_memory_eviction(self):
+        cache = ResultCache(max_memory_bytes=2 * 8 * 100)
+        cache.put(b"1", {"a": np.zeros(100)})
+        cache.put(b"2", {"a": np.zeros(100)})
+        cache.get(b"1")
+        cache.put(b"3", {"a": np.zeros(100)})
+        self.assertIsNotNone(cache.get(b"1"))
+        self.assertIsNone(cache.get(b"2"))
+        self.assertEqual(cache.stats()["evictions"], 1)
+        self.assertEqual(cache.stats()["memory_bytes"], 2 * 8 * 100)
+
+    def test_threads(self):
+        # Many threads putting and getting entries, with constant evictions
+        cache = ResultCache(max_memory_bytes=4 * 8 * 100)
+
+        def use(i):
+            for j in range(200):
+                key = bytes([(i + j) % 8])
+                if cache.get(key) is None:
+                    cache.put(key, {"a": np.zeros(100)})
+
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            list(executor.map(use, range(8)))
+        self.assertEqual(
+            cache.stats()["memory_bytes"],
+            sum(entry["a"].nbytes for entry in cache._memory.values()),
+        )
+
+    def test_disk(self):
+        ResultCache(directory=self.tmpdir.name).put(b"key", {"a": np.arange(3.0)})
+        cache = ResultCache(directory=self.tmpdir.name)
+        np.testing.assert_array_equal(cache.get(b"key")["a"], [0, 1, 2])
+        self.assertEqual(cache.stats()["disk_hits"], 1)
+        cache.get(b"key")
+        self.assertEqual(cache.stats()["memory_hits"], 1)
+
+    def test_disk_eviction(self):
+        cache = ResultCache(
+            max_memory_bytes=0, directory=self.tmpdir.name, max_disk_bytes=12000
+        )
+        for key in (b"1", b"2", b"3"):
+            cache.put(key, {"a": np.zeros(500)})
+            os.utime(cache._filename(key), (0, {b"1": 1, b"2": 2, b"3": 3}[key]))
+        cache.put(b"4", {"a": np.zeros(500)})
+        self.assertIsNone(cache.get(b"1"))
+        self.assertIsNotNone(cache.get(b"4"))
+        self.assertLessEqual(cache.stats()["disk_bytes"], 12000)
+
+    def test_clear(self):
+        cache = ResultCache(directory=self.tmpdir.name)
+        cache.put(b"key", {"a": np.arange(3.0)})
+        cache.clear()
+        self.assertIsNone(cache.get(b"key"))
+        self.assertEqual(os.listdir(self.tmpdir.name), [])
+
+
+class CachedSoilWaterTestCase(TestCase):
+    def setUp(self):
+        self.params = {
+            "theta_s": 0.5,
+            "theta_fc": 0.4,
+            "theta_wp": 0.1,
+            "zr": 0.95,
+            "zr_factor": 1000,
+            "p": 0.5,
+            "draintime": 28.6,
+            "theta_init": 0.45,
+            "refill_factor": 0.5,
+        }
+        self.data = {
+            "effective_precipitation": [0, 0, 0, 4, 0],
+            "actual_net_irrigation": ["fc", 0, 0, "fc", "model"],
+            "crop_evapotranspiration": [1, 49, 350, 3.5, 49],
+        }
+        self.cache = ResultCache()
+
+    def _calculate(self, **kwargs):
+        df = pd.DataFrame(self.data, index=pd.date_range("2018-03-15", periods=5))
+        result = calculate_soil_water(
+            timeseries=df, cache=self.cache, **dict(self.params, **kwargs)
+        )
+        return df, result
+
+    def test_hit(self):
+        df1, result1 = self._calculate()
+        df2, result2 = self._calculate()
+        pd.testing.assert_frame_equal(df1, df2)
+        self.assertEqual(result1["state"], result2["state"])
+        self.assertEqual(self.cache.stats()["hits"], 1)
+        self.assertEqual(self.cache.stats()["misses"], 1)
+
+    def test_different_parameters(self):
+        self._calculate()
+        self._calculate(theta_init=0.4)
+        self.assertEqual(self.cache.stats()["misses"], 2)
+
+    def test_arrays(self):
+        calculate_soil_water_arrays(cache=self.cache, **self.data, **self.params)
+        result = calculate_soil_water_arrays(
+            cache=self.cache, **self.data, **self.params
+        )
+        expected = calculate_soil_water_arrays(**self.data, **self.params)
+        self.assertEqual(self.cache.stats()["hits"], 1)
+        self.assertEqual(result["state"], expected["state"])
+        np.testing.assert_array_equal(result["dr"], expected["dr"])
+
+
+class CachedCropEvapotranspirationTestCase(TestCase):
+    def test_hit(self):
+        cache = ResultCache()
+        params = {
+            "planting_date": dt.date(1974, 5, 23),
+            "kc_offseason": 0.1,
+            "kc_plantingdate": 0.15,
+            "kc_stages": (KcStage(25, 0.15), KcStage(25, 1.19)),
+        }
+        timeseries = []
+        for i in range(2):
+            timeseries.append(
+                pd.DataFrame(
+                    {"ref_evapotranspiration": np.linspace(1, 6, 60)},
+                    index=pd.date_range("1974-05-13", periods=60),
+                )
+            )
+            calculate_crop_evapotranspiration(
+                timeseries=timeseries[i], cache=cache, **params
+            )
+        pd.testing.assert_frame_equal(timeseries[0], timeseries[1])
+        self.assertEqual(cache.stats()["hits"], 1)
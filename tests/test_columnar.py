@@ -0,0 +1,183 @@
+import datetime as dt
+import os
+import tempfile
+from unittest import TestCase, skipUnless
+
+import numpy as np
+import pandas as pd
+
+from swb import (
+    KcStage,
+    calculate_crop_evapotranspiration,
+    calculate_soil_water,
+    calculate_soil_water_columnar,
+    encode_actual_net_irrigation,
+    get_effective_precipitation,
+)
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:  # pragma: no cover
+    pyarrow = None
+
+
+PARAMETERS = {
+    "a": {
+        "theta_s": 0.425,
+        "theta_fc": 0.287,
+        "theta_wp": 0.14,
+        "zr": 0.5,
+        "zr_factor": 1000,
+        "p": 0.5,
+        "draintime": 16.3,
+        "theta_init": 0.2,
+        "refill_factor": 0.8,
+        "planting_date": dt.date(2018, 3, 20),
+        "kc_offseason": 0.3,
+        "kc_plantingdate": 0.7,
+        "kc_stages": (KcStage(10, 0.7), KcStage(10, 1.05), KcStage(5, 0.95)),
+    },
+    "b": {
+        "theta_s": 0.5,
+        "theta_fc": 0.4,
+        "theta_wp": 0.1,
+        "zr": 0.95,
+        "zr_factor": 1000,
+        "p": 0.4,
+        "draintime": 28.6,
+        "theta_init": 0.4,
+        "refill_factor": 0.5,
+        "planting_date": dt.date(2018, 3, 25),
+        "kc_offseason": 0.2,
+        "kc_plantingdate": 0.5,
+        "kc_stages": (KcStage(15, 0.5), KcStage(20, 1.15)),
+    },
+}
+
+
+@skipUnless(pyarrow, "pyarrow is not installed")
+class CalculateSoilWaterColumnarTestCase(TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(42)
+        self.dataframes = {}
+        for parcel in PARAMETERS:
+            self.dataframes[parcel] = pd.DataFrame(
+                data={
+                    "precipitation": rng.uniform(0, 1, 40) ** 8 * 100,
+                    "ref_evapotranspiration": rng.uniform(1, 8, 40),
+                    "actual_net_irrigation": rng.choice(
+                        ["0", "20.5", "model", "fc"], 40
+                    ),
+                },
+                index=pd.date_range("2018-03-15", periods=40),
+            )
+        self.table = pd.concat(
+            [
+                df.rename_axis("date").reset_index().assign(parcel=parcel)
+                for parcel, df in self.dataframes.items()
+            ],
+            ignore_index=True,
+        )
+        self.tempdir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tempdir.cleanup()
+
+    def _expected(self, parcel):
+        df = self.dataframes[parcel].copy()
+        df["actual_net_irrigation"] = [
+            x if x in ("model", "fc") else float(x) for x in df["actual_net_irrigation"]
+        ]
+        params = dict(PARAMETERS[parcel])
+        get_effective_precipitation(df)
+        calculate_crop_evapotranspiration(
+            timeseries=df,
+            planting_date=params.pop("planting_date"),
+            kc_offseason=params.pop("kc_offseason"),
+            kc_plantingdate=params.pop("kc_plantingdate"),
+            kc_stages=params.pop("kc_stages"),
+        )
+        result = calculate_soil_water(timeseries=df, **params)
+        return df, result
+
+    def _check(self, suffix, write):
+        input_path = os.path.join(self.tempdir.name, "input" + suffix)
+        output_path = os.path.join(self.tempdir.name, "output" + suffix)
+        write(pyarrow.Table.from_pandas(self.table, preserve_index=False), input_path)
+        states = calculate_soil_water_columnar(
+            input_path, output_path, parameters=PARAMETERS
+        )
+        if suffix == ".parquet":
+            output = pyarrow.parquet.read_table(output_path).to_pandas()
+        else:
+            output = pyarrow.ipc.open_file(output_path).read_all().to_pandas()
+        for parcel in PARAMETERS:
+            expected_df, expected_result = self._expected(parcel)
+            parcel_output = output[output["parcel"] == parcel]
+            self.assertEqual(states[parcel]["state"], expected_result["state"])
+            for name in (
+                "effective_precipitation",
+                "kc",
+                "crop_evapotranspiration",
+                "dr",
+                "theta",
+                "ks",
+                "recommended_net_irrigation",
+                "assumed_net_irrigation",
+            ):
+                np.testing.assert_array_equal(
+                    parcel_output[name].to_numpy(), expected_df[name].to_numpy()
+                )
+
+    def test_parquet(self):
+        self._check(".parquet", pyarrow.parquet.write_table)
+
+    def test_arrow(self):
+        def write(table, path):
+            with pyarrow.ipc.new_file(path, table.schema) as writer:
+                writer.write_table(table)
+
+        self._check(".arrow", write)
+
+    def test_non_consecutive_parcel(self):
+        table = pd.concat([self.table, self.table.iloc[:1]], ignore_index=True)
+        input_path = os.path.join(self.tempdir.name, "input.parquet")
+        pyarrow.parquet.write_table(
+            pyarrow.Table.from_pandas(table, preserve_index=False), input_path
+        )
+        with self.assertRaises(ValueError):
+            calculate_soil_water_columnar(
+                input_path,
+                os.path.join(self.tempdir.name, "output.parquet"),
+                parameters=PARAMETERS,
+            )
+
+    def _check_unsupported_option(self, name, value):
+        input_path = os.path.join(self.tempdir.name, "input.parquet")
+        pyarrow.parquet.write_table(
+            pyarrow.Table.from_pandas(self.table, preserve_index=False), input_path
+        )
+        parameters = dict(PARAMETERS)
+        first = next(iter(parameters))
+        parameters[first] = dict(parameters[first], **{name: value})
+        with self.assertRaises(ValueError):
+            calculate_soil_water_columnar(
+                input_path,
+                os.path.join(self.tempdir.name, "output.parquet"),
+                parameters=parameters,
+            )
+
+    def test_diagnostics(self):
+        self._check_unsupported_option("diagnostics", True)
+
+    def test_timings(self):
+        self._check_unsupported_option("timings", {})
+
+    def test_typed_irrigation(self):
+        mode, amount = encode_actual_net_irrigation(
+            self.table.pop("actual_net_irrigation").to_numpy(dtype=str)
+        )
+        self.table["actual_net_irrigation_mode"] = mode
+        self.table["actual_net_irrigation_amount"] = amount
+        self._check(".parquet", pyarrow.parquet.write_table)
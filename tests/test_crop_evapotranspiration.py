@@ -5,7 +5,15 @@ from unittest import TestCase
 import numpy as np
 import pandas as pd
 
-from swb import KcStage, calculate_crop_evapotranspiration
+from swb import (
+    KcCalendar,
+    KcCurve,
+    KcStage,
+    calculate_crop_evapotranspiration,
+    calculate_crop_evapotranspiration_arrays,
+    calculate_crop_evapotranspiration_matrix,
+    get_kc_curve,
+)
 
 
 class CalculateCropEvapotranspirationTestMixin:
@@ -141,6 +149,31 @@ class CalculateCropEvapotranspirationTestMixin:
             self.timeseries["crop_evapotranspiration"][:ndays],
         )
 
+    def test_run_starting_after_planting(self):
+        """
+        Test that when the time series starts in the middle of a stage, the model
+        calculates the same Kc as for the entire time series.
+        """
+        late_timeseries = pd.DataFrame(
+            data={"ref_evapotranspiration": np.full(70, 3.14)},
+            index=pd.date_range(self._get_date("1974-06-22"), periods=70),
+        )
+        calculate_crop_evapotranspiration(
+            timeseries=late_timeseries,
+            planting_date=dt.date(1974, 5, 23),
+            kc_offseason=0.1,
+            kc_plantingdate=0.15,
+            kc_stages=(
+                KcStage(25, 0.15),
+                KcStage(25, 1.19),
+                KcStage(30, 1.19),
+                KcStage(20, 0.35),
+            ),
+        )
+        pd.testing.assert_series_equal(
+            late_timeseries["kc"], self.timeseries["kc"][40:]
+        )
+
 
 class WithDateOnlyTimestampsTestCase(
     CalculateCropEvapotranspirationTestMixin, TestCase
@@ -200,3 +233,214 @@ class EmptyTimeseriesTestCase(TestCase):
 
     def test_result_has_crop_evapotranspiration(self):
         self.assertEqual(len(self.timeseries["crop_evapotranspiration"]), 0)
+
+
+class KcCurveTestCase(TestCase):
+    kc_stages = (
+        KcStage(25, 0.15),
+        KcStage(25, 1.19),
+        KcStage(30, 1.19),
+        KcStage(20, 0.35),
+    )
+
+    def setUp(self):
+        self.curve = KcCurve(
+            kc_offseason=0.1, kc_plantingdate=0.15, kc_stages=self.kc_stages
+        )
+
+    def test_length(self):
+        self.assertEqual(len(self.curve.kcs), 100)
+
+    def test_kc(self):
+        np.testing.assert_almost_equal(
+            self.curve.kc([-1, 0, 39, 69, 94, 99, 100]),
+            [0.1, 0.15, 0.77, 1.19, 0.56, 0.35, 0.1],
+            decimal=2,
+        )
+
+    def test_kcs_is_read_only(self):
+        with self.assertRaises(ValueError):
+            self.curve.kcs[0] = 1
+
+    def test_calculate_with_different_planting_dates(self):
+        for planting_date in (dt.date(1974, 5, 23), dt.date(1974, 6, 30)):
+            timeseries = pd.DataFrame(
+                data={"ref_evapotranspiration": np.full(110, 3.14)},
+                index=pd.date_range("1974-05-13", periods=110),
+            )
+            expected = timeseries.copy()
+            self.curve.calculate(timeseries, planting_date)
+            calculate_crop_evapotranspiration(
+                timeseries=expected,
+                planting_date=planting_date,
+                kc_offseason=0.1,
+                kc_plantingdate=0.15,
+                kc_stages=self.kc_stages,
+            )
+            pd.testing.assert_frame_equal(timeseries, expected)
+
+
+class GetKcCurveTestCase(TestCase):
+    def test_same_parameters_give_same_object(self):
+        curve1 = get_kc_curve(
+            kc_offseason=0.1,
+            kc_plantingdate=0.15,
+            kc_stages=(KcStage(25, 0.15), KcStage(25, 1.19)),
+        )
+        curve2 = get_kc_curve(
+            kc_offseason=0.1, kc_plantingdate=0.15, kc_stages=[(25, 0.15), (25, 1.19)]
+        )
+        self.assertIs(curve1, curve2)
+
+    def test_different_parameters_give_different_objects(self):
+        curve1 = get_kc_curve(
+            kc_offseason=0.1, kc_plantingdate=0.15, kc_stages=[(25, 0.15)]
+        )
+        curve2 = get_kc_curve(
+            kc_offseason=0.2, kc_plantingdate=0.15, kc_stages=[(25, 0.15)]
+        )
+        self.assertIsNot(curve1, curve2)
+
+
+class CalculateCropEvapotranspirationMatrixTestCase(TestCase):
+    kc_params = {
+        "kc_offseason": 0.1,
+        "kc_plantingdate": 0.15,
+        "kc_stages": (
+            KcStage(25, 0.15),
+            KcStage(25, 1.19),
+            KcStage(30, 1.19),
+            KcStage(20, 0.35),
+        ),
+    }
+
+    def setUp(self):
+        self.dates = pd.date_range("1974-05-13", periods=110)
+        self.ref_evapotranspiration = np.linspace(2, 6, 110)
+        self.planting_dates = [
+            dt.date(1974, 5, 1),
+            dt.date(1974, 5, 23),
+            dt.date(1974, 7, 2),
+        ]
+        self.result = calculate_crop_evapotranspiration_matrix(
+            ref_evapotranspiration=self.ref_evapotranspiration,
+            dates=self.dates,
+            planting_dates=self.planting_dates,
+            **self.kc_params,
+        )
+
+    def test_shape(self):
+        self.assertEqual(self.result["kc"].shape, (3, 110))
+        self.assertEqual(self.result["crop_evapotranspiration"].shape, (3, 110))
+
+    def test_same_as_calculate_crop_evapotranspiration(self):
+        for i, planting_date in enumerate(self.planting_dates):
+            timeseries = pd.DataFrame(
+                data={"ref_evapotranspiration": self.ref_evapotranspiration},
+                index=self.dates,
+            )
+            calculate_crop_evapotranspiration(
+                timeseries=timeseries, planting_date=planting_date, **self.kc_params
+            )
+            np.testing.assert_array_equal(self.result["kc"][i], timeseries["kc"])
+            np.testing.assert_array_equal(
+                self.result["crop_evapotranspiration"][i],
+                timeseries["crop_evapotranspiration"],
+            )
+
+
+class CalculateCropEvapotranspirationArraysTestCase(TestCase):
+    def test_result(self):
+        result = calculate_crop_evapotranspiration_arrays(
+            ref_evapotranspiration=[3.14, 3.14, 3.14],
+            day_offsets=[-1, 39, 100],
+            kc_offseason=0.1,
+            kc_plantingdate=0.15,
+            kc_stages=(
+                KcStage(25, 0.15),
+                KcStage(25, 1.19),
+                KcStage(30, 1.19),
+                KcStage(20, 0.35),
+            ),
+        )
+        np.testing.assert_almost_equal(result["kc"], [0.1, 0.77, 0.1], decimal=2)
+        np.testing.assert_almost_equal(
+            result["crop_evapotranspiration"], [0.314, 2.43, 0.314], decimal=2
+        )
+
+
+class KcCalendarTestCase(TestCase):
+    wheat = {
+        "kc_offseason": 0.3,
+        "kc_plantingdate": 0.4,
+        "kc_stages": (KcStage(20, 0.4), KcStage(30, 1.15), KcStage(40, 0.4)),
+    }
+    maize = {
+        "kc_offseason": 0.2,
+        "kc_plantingdate": 0.3,
+        "kc_stages": (KcStage(25, 0.3), KcStage(35, 1.2), KcStage(30, 0.6)),
+    }
+
+    def setUp(self):
+        self.seasons = [
+            (dt.date(2019, 6, 1), self.maize),
+            (dt.date(2018, 11, 10), self.wheat),
+            (dt.date(2020, 6, 5), self.maize),
+            (dt.date(2019, 11, 15), self.wheat),
+        ]
+        self.calendar = KcCalendar(self.seasons)
+        self.timeseries = pd.DataFrame(
+            data={"ref_evapotranspiration": np.linspace(1, 6, 900)},
+            index=pd.date_range("2018-10-01", periods=900),
+        )
+
+    def test_same_as_single_seasons(self):
+        kc = self.calendar.kc(self.timeseries.index)
+        seasons = sorted(self.seasons, key=lambda season: season[0])
+        for i, (planting_date, crop) in enumerate(seasons):
+            start = pd.Timestamp(planting_date) if i else self.timeseries.index[0]
+            end = (
+                pd.Timestamp(seasons[i + 1][0]) - pd.Timedelta(days=1)
+                if i + 1 < len(seasons)
+                else self.timeseries.index[-1]
+            )
+            timeseries = self.timeseries.loc[start:end].copy()
+            calculate_crop_evapotranspiration(
+                timeseries=timeseries, planting_date=planting_date, **crop
+            )
+            np.testing.assert_array_equal(
+                kc[self.timeseries.index.slice_indexer(start, end)], timeseries["kc"]
+            )
+
+    def test_offseason(self):
+        kc = pd.Series(self.calendar.kc(self.timeseries.index), self.timeseries.index)
+        # Before the first planting date
+        self.assertEqual(kc["2018-11-09"], 0.3)
+        # After maize has ended (on 2019-08-29) and before wheat is planted
+        self.assertEqual(kc["2019-09-15"], 0.2)
+
+    def test_kc_curves_are_accepted(self):
+        calendar = KcCalendar(
+            [
+                (planting_date, get_kc_curve(**crop))
+                for planting_date, crop in self.seasons
+            ]
+        )
+        np.testing.assert_array_equal(
+            calendar.kc(self.timeseries.index), self.calendar.kc(self.timeseries.index)
+        )
+
+    def test_calculate(self):
+        self.calendar.calculate(self.timeseries)
+        np.testing.assert_array_equal(
+            self.timeseries["crop_evapotranspiration"],
+            self.timeseries["ref_evapotranspiration"] * self.timeseries["kc"],
+        )
+
+    def test_same_planting_date(self):
+        with self.assertRaises(ValueError):
+            KcCalendar([(dt.date(2019, 6, 1), self.maize)] * 2)
+
+    def test_no_seasons(self):
+        with self.assertRaises(ValueError):
+            KcCalendar([])
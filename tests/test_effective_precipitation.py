@@ -1,8 +1,9 @@
 from unittest import TestCase
 
+import numpy as np
 import pandas as pd
 
-from swb import get_effective_precipitation
+from swb import get_effective_precipitation, get_effective_precipitation_arrays
 
 
 class GetEffectivePrecipitationTestCase(TestCase):
@@ -32,3 +33,13 @@ class GetEffectivePrecipitationTestCase(TestCase):
         pd.testing.assert_frame_equal(
             self.timeseries, self.expected_result, check_like=True
         )
+
+
+class GetEffectivePrecipitationArraysTestCase(TestCase):
+    def test_get_effective_precipitation_arrays(self):
+        np.testing.assert_almost_equal(
+            get_effective_precipitation_arrays(
+                precipitation=[0.5, 0.6, 0.7], ref_evapotranspiration=[1.6, 2.7, 3.8]
+            ),
+            [0.4, 0.48, 0],
+        )
@@ -0,0 +1,84 @@
+from unittest import TestCase
+
+import numpy as np
+
+from swb import calculate_soil_water_arrays, calculate_soil_water_ensemble
+
+
+class CalculateSoilWaterEnsembleTestCase(TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(11)
+        self.params = {
+            "theta_s": 0.425,
+            "theta_fc": 0.287,
+            "theta_wp": 0.14,
+            "zr": 0.5,
+            "zr_factor": 1000,
+            "p": 0.5,
+            "draintime": 2.2,
+            "refill_factor": 0.5,
+        }
+        self.effective_precipitation = rng.uniform(0, 1, (50, 15)) ** 8 * 40
+        self.crop_evapotranspiration = rng.uniform(2, 7, 15)
+
+        # The state at the end of a previous run
+        self.state = calculate_soil_water_arrays(
+            effective_precipitation=[0, 0, 3, 0],
+            crop_evapotranspiration=[4, 5, 5, 6],
+            actual_net_irrigation=0.0,
+            theta_init=0.25,
+            **self.params,
+        )["state"]
+
+        self.result = calculate_soil_water_ensemble(
+            effective_precipitation=self.effective_precipitation,
+            crop_evapotranspiration=self.crop_evapotranspiration,
+            initial_state=self.state,
+            percentiles=(10, 50, 90),
+            member_outputs=("theta", "dr"),
+            **self.params,
+        )
+
+        # Each member run separately
+        self.members = [
+            calculate_soil_water_arrays(
+                effective_precipitation=member,
+                crop_evapotranspiration=self.crop_evapotranspiration,
+                actual_net_irrigation=0.0,
+                initial_state=self.state,
+                **self.params,
+            )
+            for member in self.effective_precipitation
+        ]
+
+    def _stack(self, name):
+        return np.array([member[name] for member in self.members])
+
+    def test_member_outputs(self):
+        np.testing.assert_array_equal(
+            self.result["members"]["theta"], self._stack("theta")
+        )
+        np.testing.assert_array_equal(self.result["members"]["dr"], self._stack("dr"))
+        self.assertNotIn("ks", self.result["members"])
+
+    def test_mean(self):
+        for name in ("recommended_net_irrigation", "theta", "ks"):
+            np.testing.assert_allclose(
+                self.result["mean"][name], self._stack(name).mean(axis=0)
+            )
+
+    def test_percentiles(self):
+        self.assertEqual(self.result["percentiles"]["theta"].shape, (3, 15))
+        np.testing.assert_allclose(
+            self.result["percentiles"]["theta"][1],
+            np.median(self._stack("theta"), axis=0),
+        )
+
+    def test_exceeds_raw_probability(self):
+        raw = self.members[0]["raw"]
+        self.assertEqual(self.result["raw"], raw)
+        np.testing.assert_allclose(
+            self.result["exceeds_raw_probability"],
+            (self._stack("dr") > raw).mean(axis=0),
+        )
+        self.assertTrue(0 < self.result["exceeds_raw_probability"][-1] <= 1)
@@ -0,0 +1,129 @@
+import importlib.util
+from unittest import TestCase, skipUnless
+
+import numpy as np
+
+from swb import (
+    IRRIGATION_MODEL,
+    NetIrrigation,
+    calculate_soil_water_batch,
+    calculate_soil_water_grid,
+    encode_actual_net_irrigation,
+)
+
+HAVE_NUMBA = importlib.util.find_spec("numba") is not None
+
+
+class CalculateSoilWaterGridTestCase(TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(42)
+        ntimes, ny, nx = 20, 5, 7
+        self.inputs = {
+            "effective_precipitation": rng.uniform(0, 1, (ntimes, ny, nx)) ** 8 * 100,
+            "crop_evapotranspiration": rng.uniform(0, 8, (ntimes, ny, nx)),
+            "actual_net_irrigation": "model",
+        }
+        self.params = {
+            "theta_s": 0.425,
+            "theta_fc": rng.uniform(0.25, 0.3, (ny, nx)),
+            "theta_wp": 0.14,
+            "zr": rng.uniform(0.3, 1, (ny, nx)),
+            "zr_factor": 1000,
+            "p": 0.5,
+            "draintime": 16.3,
+            "theta_init": 0.2,
+            "refill_factor": 0.8,
+        }
+        self.nodata_mask = rng.uniform(size=(ny, nx)) < 0.2
+        self.valid = ~self.nodata_mask
+        self.expected = calculate_soil_water_batch(
+            effective_precipitation=self.inputs["effective_precipitation"][
+                :, self.valid
+            ].T,
+            crop_evapotranspiration=self.inputs["crop_evapotranspiration"][
+                :, self.valid
+            ].T,
+            actual_net_irrigation="model",
+            theta_fc=self.params["theta_fc"][self.valid],
+            zr=self.params["zr"][self.valid],
+            **{
+                name: value
+                for name, value in self.params.items()
+                if name not in ("theta_fc", "zr")
+            },
+        )
+
+    def _check(self, chunks):
+        result = calculate_soil_water_grid(
+            nodata_mask=self.nodata_mask, chunks=chunks, **self.inputs, **self.params
+        )
+        for name in ("dr", "theta", "ks", "recommended_net_irrigation"):
+            self.assertEqual(result[name].shape, (20, 5, 7))
+            np.testing.assert_array_equal(
+                result[name][:, self.valid], self.expected[name].T
+            )
+            self.assertTrue(np.isnan(result[name][:, self.nodata_mask]).all())
+        np.testing.assert_array_equal(result["taw"][self.valid], self.expected["taw"])
+        self.assertTrue(np.isnan(result["taw"][self.nodata_mask]).all())
+
+    def test_without_chunks(self):
+        self._check(None)
+
+    def test_with_chunks(self):
+        self._check((2, 3))
+
+    def _check_shared_crop_evapotranspiration(self, backend):
+        # A one-dimensional crop evapotranspiration is shared by all pixels
+        etc = self.inputs["crop_evapotranspiration"][:, 0, 0].copy()
+        result = calculate_soil_water_grid(
+            effective_precipitation=self.inputs["effective_precipitation"],
+            crop_evapotranspiration=etc,
+            nodata_mask=self.nodata_mask,
+            chunks=(2, 3),
+            backend=backend,
+            **self.params,
+        )
+        expected = calculate_soil_water_grid(
+            effective_precipitation=self.inputs["effective_precipitation"],
+            crop_evapotranspiration=np.broadcast_to(
+                etc[:, np.newaxis, np.newaxis], (20, 5, 7)
+            ),
+            nodata_mask=self.nodata_mask,
+            backend="numpy",
+            **self.params,
+        )
+        for name in ("dr", "theta", "ks", "recommended_net_irrigation"):
+            np.testing.assert_array_equal(result[name], expected[name])
+
+    def test_shared_crop_evapotranspiration_numpy(self):
+        self._check_shared_crop_evapotranspiration("numpy")
+
+    @skipUnless(HAVE_NUMBA, "numba is not installed")
+    def test_shared_crop_evapotranspiration_numba(self):
+        self._check_shared_crop_evapotranspiration("numba")
+
+    def test_net_irrigation_scalar(self):
+        result = calculate_soil_water_grid(
+            nodata_mask=self.nodata_mask,
+            chunks=(2, 3),
+            **dict(
+                self.inputs, actual_net_irrigation=NetIrrigation(IRRIGATION_MODEL, 0.0)
+            ),
+            **self.params,
+        )
+        for name in ("dr", "theta", "ks", "recommended_net_irrigation"):
+            np.testing.assert_array_equal(
+                result[name][:, self.valid], self.expected[name].T
+            )
+
+    def test_net_irrigation_stack(self):
+        rng = np.random.default_rng(42)
+        irrigation = rng.choice(
+            np.array([0, 20.5, "model", "fc"], dtype=object), (20, 5, 7)
+        )
+        inputs = dict(self.inputs, actual_net_irrigation=irrigation)
+        expected = calculate_soil_water_grid(**inputs, **self.params)
+        inputs["actual_net_irrigation"] = encode_actual_net_irrigation(irrigation)
+        result = calculate_soil_water_grid(chunks=(2, 3), **inputs, **self.params)
+        for name in ("dr", "theta", "ks", "recommended_net_irrigation"):
+            np.testing.assert_array_equal(result[name], expected[name])
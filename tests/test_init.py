@@ -0,0 +1,17 @@
+import subprocess
+import sys
+from unittest import TestCase
+
+
+class ImportTestCase(TestCase):
+    def test_import_does_not_load_pandas(self):
+        code = "import sys, swb; sys.exit('pandas' in sys.modules)"
+        self.assertEqual(subprocess.run([sys.executable, "-c", code]).returncode, 0)
+
+    def test_import_does_not_load_concurrency_modules(self):
+        code = (
+            "import sys, swb; "
+            "sys.exit(any(m in sys.modules for m in "
+            "('asyncio', 'concurrent.futures', 'multiprocessing')))"
+        )
+        self.assertEqual(subprocess.run([sys.executable, "-c", code]).returncode, 0)
@@ -0,0 +1,82 @@
+import os
+import tempfile
+from unittest import TestCase
+
+import numpy as np
+
+from swb import NetIrrigation, calculate_soil_water_batch, calculate_soil_water_memmap
+
+
+class CalculateSoilWaterMemmapTestCase(TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(42)
+        self.tempdir = tempfile.TemporaryDirectory()
+        self.inputs = {
+            "effective_precipitation": rng.uniform(0, 1, (10, 30)) ** 8 * 100,
+            "crop_evapotranspiration": rng.uniform(0, 8, (10, 30)),
+            "actual_net_irrigation": rng.choice([0, 0, 25.0], (10, 30)),
+        }
+        self.memmaps = {}
+        for name, values in self.inputs.items():
+            filename = os.path.join(self.tempdir.name, name + ".npy")
+            np.save(filename, values)
+            self.memmaps[name] = np.load(filename, mmap_mode="r")
+        self.params = {
+            "theta_s": 0.425,
+            "theta_fc": rng.uniform(0.25, 0.3, 10),
+            "theta_wp": 0.14,
+            "zr": rng.uniform(0.3, 1, 10),
+            "zr_factor": 1000,
+            "p": 0.5,
+            "draintime": 16.3,
+            "theta_init": 0.2,
+            "refill_factor": 0.8,
+        }
+        self.output_dir = os.path.join(self.tempdir.name, "output")
+        self.result = calculate_soil_water_memmap(
+            output_dir=self.output_dir, block_size=3, **self.memmaps, **self.params
+        )
+        self.expected = calculate_soil_water_batch(**self.inputs, **self.params)
+
+    def tearDown(self):
+        del self.result
+        self.tempdir.cleanup()
+
+    def test_result(self):
+        for name in ("dr", "theta", "ks", "recommended_net_irrigation", "raw"):
+            np.testing.assert_array_equal(self.result[name], self.expected[name])
+
+    def test_output_files(self):
+        theta = np.load(os.path.join(self.output_dir, "theta.npy"))
+        np.testing.assert_array_equal(theta, self.expected["theta"])
+
+    def test_net_irrigation(self):
+        mode = np.zeros((10, 30), dtype=np.int8)
+        mode[:, ::7] = 2
+        filename = os.path.join(self.tempdir.name, "mode.npy")
+        np.save(filename, mode)
+        irrigation = NetIrrigation(
+            np.load(filename, mmap_mode="r"), self.memmaps["actual_net_irrigation"]
+        )
+        result = calculate_soil_water_memmap(
+            output_dir=os.path.join(self.tempdir.name, "output2"),
+            block_size=3,
+            **dict(self.memmaps, actual_net_irrigation=irrigation),
+            **self.params,
+        )
+        expected = calculate_soil_water_batch(
+            **dict(self.inputs, actual_net_irrigation=irrigation), **self.params
+        )
+        for name in ("dr", "theta", "ks", "recommended_net_irrigation"):
+            np.testing.assert_array_equal(result[name], expected[name])
+
+    def test_max_memory_bytes(self):
+        # Room for about 4 cells of 30 days, so there are three blocks
+        result = calculate_soil_water_memmap(
+            output_dir=os.path.join(self.tempdir.name, "output2"),
+            max_memory_bytes=4 * 80 * 30,
+            **self.memmaps,
+            **self.params,
+        )
+        for name in ("dr", "theta", "ks", "recommended_net_irrigation"):
+            np.testing.assert_array_equal(result[name], self.expected[name])
@@ -0,0 +1,106 @@
+import os
+from unittest import TestCase, skipUnless
+
+import numpy as np
+import pandas as pd
+
+from swb import ResultCache, calculate_soil_water, calculate_soil_water_parallel
+
+
+def _make_job(i):
+    rng = np.random.default_rng(i)
+    ndays = 20 + i
+    timeseries = pd.DataFrame(
+        data={
+            "effective_precipitation": rng.uniform(0, 1, ndays) ** 8 * 100,
+            "crop_evapotranspiration": rng.uniform(0, 8, ndays),
+            "actual_net_irrigation": rng.choice(
+                np.array([0, 20.5, "model", "fc"], dtype=object), ndays
+            ),
+        },
+        index=pd.date_range("2018-03-15", periods=ndays),
+    )
+    return {
+        "theta_s": 0.5,
+        "theta_fc": 0.4,
+        "theta_wp": 0.1,
+        "zr": 0.5 + i / 10,
+        "zr_factor": 1000,
+        "p": 0.5,
+        "draintime": 28.6,
+        "theta_init": 0.3,
+        "refill_factor": 0.5,
+        "timeseries": timeseries,
+    }
+
+
+class CalculateSoilWaterParallelTestCase(TestCase):
+    njobs = 7
+
+    def _check_results(self, results):
+        self.assertEqual(len(results), self.njobs)
+        for result in results:
+            i = len(result["timeseries"]) - 20
+            expected = calculate_soil_water(**_make_job(i))
+            self.assertEqual(result["taw"], expected["taw"])
+            self.assertEqual(result["raw"], expected["raw"])
+            self.assertEqual(result["state"], expected["state"])
+            pd.testing.assert_frame_equal(result["timeseries"], expected["timeseries"])
+
+    def test_ordered(self):
+        jobs = [_make_job(i) for i in range(self.njobs)]
+        results = list(
+            calculate_soil_water_parallel(jobs, workers=2, chunksize=2, ordered=True)
+        )
+        self._check_results(results)
+        for job, result in zip(jobs, results):
+            self.assertIs(result["timeseries"], job["timeseries"])
+
+    def test_unordered(self):
+        jobs = (_make_job(i) for i in range(self.njobs))
+        results = list(
+            calculate_soil_water_parallel(jobs, workers=3, chunksize=3, ordered=False)
+        )
+        self._check_results(results)
+
+    def test_outputs_and_dtype(self):
+        options = {"outputs": ("theta", "ks"), "dtype": np.float32}
+        jobs = [dict(_make_job(i), **options) for i in range(self.njobs)]
+        results = list(calculate_soil_water_parallel(jobs, workers=2, chunksize=2))
+        for i, result in enumerate(results):
+            expected = calculate_soil_water(**_make_job(i), **options)
+            self.assertEqual(result["state"], expected["state"])
+            pd.testing.assert_frame_equal(result["timeseries"], expected["timeseries"])
+            self.assertNotIn("dr", result["timeseries"])
+            self.assertEqual(result["timeseries"]["theta"].dtype, np.float32)
+
+    def test_diagnostics(self):
+        jobs = [dict(_make_job(i), diagnostics=True) for i in range(self.njobs)]
+        results = list(calculate_soil_water_parallel(jobs, workers=2, chunksize=2))
+        for i, result in enumerate(results):
+            expected = calculate_soil_water(**_make_job(i), diagnostics=True)
+            self.assertIn("dr_without_irrig", result["timeseries"])
+            pd.testing.assert_frame_equal(result["timeseries"], expected["timeseries"])
+
+    def test_cache(self):
+        jobs = [dict(_make_job(0), cache=ResultCache())]
+        with self.assertRaises(ValueError):
+            list(calculate_soil_water_parallel(jobs, workers=1))
+
+    def test_timings(self):
+        jobs = [dict(_make_job(0), timings={})]
+        with self.assertRaises(ValueError):
+            list(calculate_soil_water_parallel(jobs, workers=1))
+
+    def test_empty(self):
+        self.assertEqual(list(calculate_soil_water_parallel([], workers=2)), [])
+
+    @skipUnless(os.path.isdir("/dev/shm"), "shared memory is not in /dev/shm")
+    def test_close_frees_shared_memory(self):
+        before = set(os.listdir("/dev/shm"))
+        results = calculate_soil_water_parallel(
+            (_make_job(i) for i in range(self.njobs)), workers=2, chunksize=1
+        )
+        next(results)
+        results.close()
+        self.assertEqual(set(os.listdir("/dev/shm")) - before, set())
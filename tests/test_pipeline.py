@@ -0,0 +1,93 @@
+import datetime as dt
+from unittest import TestCase
+
+import numpy as np
+import pandas as pd
+
+from swb import (
+    KcStage,
+    calculate_crop_evapotranspiration,
+    calculate_soil_water,
+    calculate_soil_water_pipeline,
+    get_effective_precipitation,
+)
+
+
+class CalculateSoilWaterPipelineTestCase(TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(7)
+        self.dates = pd.date_range("2019-03-01", periods=150)
+        self.precipitation = rng.uniform(0, 1, 150) ** 6 * 40
+        self.ref_evapotranspiration = rng.uniform(1, 7, 150)
+        self.crop = {
+            "planting_date": dt.date(2019, 3, 21),
+            "kc_offseason": 0.3,
+            "kc_plantingdate": 0.7,
+            "kc_stages": (
+                KcStage(35, 0.7),
+                KcStage(45, 1.05),
+                KcStage(40, 1.05),
+                KcStage(15, 0.95),
+            ),
+        }
+        self.soil = {
+            "theta_s": 0.425,
+            "theta_fc": 0.287,
+            "theta_wp": 0.14,
+            "zr": 0.5,
+            "zr_factor": 1000,
+            "p": 0.5,
+            "draintime": 2.2,
+            "theta_init": 0.19,
+            "refill_factor": 0.5,
+        }
+
+        # The same calculation, step by step
+        self.timeseries = pd.DataFrame(
+            {
+                "precipitation": self.precipitation,
+                "ref_evapotranspiration": self.ref_evapotranspiration,
+                "actual_net_irrigation": "model",
+            },
+            index=self.dates,
+        )
+        get_effective_precipitation(self.timeseries)
+        calculate_crop_evapotranspiration(timeseries=self.timeseries, **self.crop)
+        self.expected = calculate_soil_water(timeseries=self.timeseries, **self.soil)
+
+    def _run(self, **kwargs):
+        return calculate_soil_water_pipeline(
+            precipitation=self.precipitation,
+            ref_evapotranspiration=self.ref_evapotranspiration,
+            dates=self.dates,
+            actual_net_irrigation="model",
+            **self.crop,
+            **self.soil,
+            **kwargs,
+        )
+
+    def test_same_as_separate_steps(self):
+        result = self._run()
+        self.assertEqual(result["state"], self.expected["state"])
+        for name in ("dr", "theta", "ks", "assumed_net_irrigation"):
+            np.testing.assert_array_equal(result[name], self.timeseries[name])
+
+    def test_no_intermediate_outputs_by_default(self):
+        result = self._run()
+        for name in ("effective_precipitation", "kc", "crop_evapotranspiration"):
+            self.assertNotIn(name, result)
+
+    def test_intermediate_outputs(self):
+        result = self._run(
+            intermediate_outputs=(
+                "effective_precipitation",
+                "kc",
+                "crop_evapotranspiration",
+            )
+        )
+        for name in ("effective_precipitation", "kc", "crop_evapotranspiration"):
+            np.testing.assert_array_equal(result[name], self.timeseries[name])
+
+    def test_unknown_intermediate_output(self):
+        with self.assertRaises(ValueError):
+            self._run(intermediate_outputs=("ro",))
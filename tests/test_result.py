@@ -0,0 +1,120 @@
+import datetime as dt
+from unittest import TestCase
+
+import numpy as np
+import pandas as pd
+
+from swb import (
+    KcStage,
+    Result,
+    calculate_crop_evapotranspiration,
+    calculate_crop_evapotranspiration_result,
+    calculate_soil_water,
+    calculate_soil_water_result,
+    get_effective_precipitation,
+    get_effective_precipitation_result,
+)
+
+
+class ResultTestCase(TestCase):
+    def setUp(self):
+        self.index = pd.date_range("2018-03-15", periods=3)
+        self.a = np.array([1.0, 2.0, 3.0])
+        self.b = np.array([4.0, 5.0, 6.0], dtype=np.float32)
+        self.result = Result(self.index, {"a": self.a, "b": self.b}, taw=42)
+
+    def test_mapping(self):
+        self.assertEqual(list(self.result), ["a", "b"])
+        self.assertEqual(len(self.result), 2)
+        self.assertIs(self.result["a"], self.a)
+
+    def test_attributes(self):
+        self.assertEqual(self.result.taw, 42)
+        self.assertIs(self.result.index, self.index)
+
+    def test_to_frame(self):
+        df = self.result.to_frame()
+        pd.testing.assert_index_equal(df.index, self.index)
+        self.assertEqual(df["b"].dtype, np.float32)
+        self.assertTrue(np.shares_memory(df["a"].to_numpy(), self.a))
+        self.assertTrue(np.shares_memory(df["b"].to_numpy(), self.b))
+
+
+class CalculateSoilWaterResultTestCase(TestCase):
+    def setUp(self):
+        self.params = {
+            "theta_s": 0.5,
+            "theta_fc": 0.4,
+            "theta_wp": 0.1,
+            "zr": 0.95,
+            "zr_factor": 1000,
+            "p": 0.5,
+            "draintime": 28.6,
+            "theta_init": 0.45,
+            "refill_factor": 0.5,
+        }
+        self.timeseries = pd.DataFrame(
+            {
+                "effective_precipitation": [0, 0, 0, 4, 0],
+                "actual_net_irrigation": ["fc", 0, 0, "fc", "model"],
+                "crop_evapotranspiration": [1, 49, 350, 3.5, 49],
+            },
+            index=pd.date_range("2018-03-15", periods=5),
+        )
+        self.original = self.timeseries.copy()
+        self.result = calculate_soil_water_result(
+            timeseries=self.timeseries, **self.params
+        )
+
+    def test_input_is_untouched(self):
+        pd.testing.assert_frame_equal(self.timeseries, self.original)
+
+    def test_same_as_calculate_soil_water(self):
+        input_columns = list(self.original.columns)
+        expected = calculate_soil_water(timeseries=self.original, **self.params)
+        self.assertEqual(self.result.raw, expected["raw"])
+        self.assertEqual(self.result.taw, expected["taw"])
+        self.assertEqual(self.result.state, expected["state"])
+        pd.testing.assert_frame_equal(
+            self.result.to_frame(),
+            expected["timeseries"].drop(columns=input_columns),
+        )
+
+
+class CalculateCropEvapotranspirationResultTestCase(TestCase):
+    def test_same_as_calculate_crop_evapotranspiration(self):
+        timeseries = pd.DataFrame(
+            {"ref_evapotranspiration": np.full(30, 3.14)},
+            index=pd.date_range("1974-05-13", periods=30),
+        )
+        params = {
+            "planting_date": dt.date(1974, 5, 23),
+            "kc_offseason": 0.1,
+            "kc_plantingdate": 0.15,
+            "kc_stages": (KcStage(5, 0.15), KcStage(10, 1.19)),
+        }
+        result = calculate_crop_evapotranspiration_result(
+            timeseries=timeseries, **params
+        )
+        self.assertEqual(list(timeseries.columns), ["ref_evapotranspiration"])
+        calculate_crop_evapotranspiration(timeseries=timeseries, **params)
+        pd.testing.assert_frame_equal(
+            result.to_frame(), timeseries[["kc", "crop_evapotranspiration"]]
+        )
+
+
+class GetEffectivePrecipitationResultTestCase(TestCase):
+    def test_same_as_get_effective_precipitation(self):
+        timeseries = pd.DataFrame(
+            {
+                "ref_evapotranspiration": [1.6, 2.7, 3.8],
+                "precipitation": [0.5, 0.6, 0.7],
+            },
+            index=pd.date_range("1974-05-12", periods=3),
+        )
+        result = get_effective_precipitation_result(timeseries)
+        self.assertNotIn("effective_precipitation", timeseries.columns)
+        get_effective_precipitation(timeseries)
+        np.testing.assert_array_equal(
+            result["effective_precipitation"], timeseries["effective_precipitation"]
+        )
@@ -0,0 +1,60 @@
+from unittest import TestCase
+
+import numpy as np
+
+from swb import calculate_soil_water_arrays, optimize_irrigation_schedule
+
+
+class OptimizeIrrigationScheduleTestCase(TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(3)
+        self.params = {
+            "theta_s": 0.425,
+            "theta_fc": 0.287,
+            "theta_wp": 0.14,
+            "zr": 0.5,
+            "zr_factor": 1000,
+            "p": 0.5,
+            "draintime": 2.2,
+            "theta_init": 0.25,
+            "refill_factor": 1.0,
+            "effective_precipitation": rng.uniform(0, 1, 180) ** 10 * 60,
+            "crop_evapotranspiration": rng.uniform(3, 7, 180),
+        }
+        self.unirrigated = calculate_soil_water_arrays(
+            actual_net_irrigation=0.0, **self.params
+        )
+
+    def test_avoids_stress(self):
+        result = optimize_irrigation_schedule(**self.params)
+        self.assertGreater((self.unirrigated["ks"] < 1).sum(), 0)
+        self.assertEqual(result["stress_days"], 0)
+
+    def test_series_match_schedule(self):
+        result = optimize_irrigation_schedule(max_events=3, **self.params)
+        expected = calculate_soil_water_arrays(
+            actual_net_irrigation=result["schedule"], **self.params
+        )
+        for name in ("dr", "theta", "ks"):
+            np.testing.assert_array_equal(result[name], expected[name])
+        self.assertEqual(result["stress_days"], (expected["ks"] < 1).sum())
+        self.assertAlmostEqual(result["total_net_irrigation"], result["schedule"].sum())
+
+    def test_max_events(self):
+        result = optimize_irrigation_schedule(max_events=5, **self.params)
+        self.assertEqual((result["schedule"] > 0).sum(), 5)
+        self.assertLess(result["stress_days"], (self.unirrigated["ks"] < 1).sum())
+
+    def test_water_budget(self):
+        result = optimize_irrigation_schedule(
+            water_budget=150, amounts=(20, 40, "fc"), **self.params
+        )
+        self.assertLessEqual(result["total_net_irrigation"], 150 + 1e-9)
+        self.assertGreater(result["total_net_irrigation"], 0)
+        self.assertLess(result["stress_days"], (self.unirrigated["ks"] < 1).sum())
+
+    def test_no_stress(self):
+        self.params["crop_evapotranspiration"] = np.zeros(180)
+        result = optimize_irrigation_schedule(**self.params)
+        self.assertEqual(result["stress_days"], 0)
+        self.assertFalse(result["schedule"].any())
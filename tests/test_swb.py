@@ -3,7 +3,19 @@ from unittest import TestCase
 import numpy as np
 import pandas as pd
 
-from swb import SoilWaterBalance, calculate_soil_water
+from swb import (
+    DIAGNOSTIC_COLUMNS,
+    IRRIGATION_FC,
+    IRRIGATION_MODEL,
+    IRRIGATION_NUMERIC,
+    NetIrrigation,
+    SoilWaterBalance,
+    SoilWaterState,
+    calculate_soil_water,
+    calculate_soil_water_arrays,
+    calculate_soil_water_stream,
+    encode_actual_net_irrigation,
+)
 
 
 class SimpleMethodsTestCase(TestCase):
@@ -138,6 +150,60 @@ class AutoApplyIrrigationTestCase(ModelTestCase):
         )
 
 
+class FcIrrigationTestCase(ModelTestCase):
+    @classmethod
+    def setUpData(cls):
+        data = {
+            "effective_precipitation": [0, 0, 0, 4, 0],
+            "actual_net_irrigation": ["fc", 0, 0, "fc", "model"],
+            "crop_evapotranspiration": [1, 49, 350, 3.5, 49],
+        }
+        cls.df = pd.DataFrame(data, index=pd.date_range("2018-03-15", periods=5))
+
+    @classmethod
+    def setUpClass(cls):
+        cls.setUpData()
+        calculate_soil_water(
+            theta_s=0.5,
+            theta_fc=0.4,
+            theta_wp=0.1,
+            zr=0.95,
+            zr_factor=1000,
+            p=0.5,
+            draintime=28.6,
+            timeseries=cls.df,
+            theta_init=0.45,
+            refill_factor=0.5,
+        )
+
+    def test_dr(self):
+        np.testing.assert_almost_equal(
+            self.df["dr"], [-95.0, -42.7, 285.0, 0, 49.0], decimal=1
+        )
+
+    def test_theta(self):
+        np.testing.assert_almost_equal(
+            self.df["theta"], [0.5, 0.445, 0.1, 0.4, 0.348], decimal=3
+        )
+
+    def test_ks(self):
+        np.testing.assert_almost_equal(self.df["ks"], [1, 1, 1, 0, 1], decimal=3)
+
+    def test_recommended_net_irrigation(self):
+        np.testing.assert_almost_equal(
+            self.df["recommended_net_irrigation"],
+            [0, 0, 154.4, 140.5, 0],
+            decimal=1,
+        )
+
+    def test_assumed_net_irrigation(self):
+        # On the first day the soil is above field capacity, so "fc" brings it to
+        # saturation; on the fourth day it brings it to field capacity.
+        np.testing.assert_almost_equal(
+            self.df["assumed_net_irrigation"], [50.2, 0, 0, 281.0, 0], decimal=1
+        )
+
+
 class ModelRunWithDrOutsideLimitsTestCase(TestCase):
     """Test FAO56 eq. 86 p. 170."""
 
@@ -186,3 +252,369 @@ class DpTestCase(TestCase):
 
     def test_dp_when_theta_more_than_theta_s(self):
         self.assertAlmostEqual(self.swb.dp(0.5, 20.0), 5.46012270)
+
+
+class ResumeFromStateTestCase(TestCase):
+    """Test that running in two parts gives the same result as running at once."""
+
+    def setUp(self):
+        rng = np.random.default_rng(42)
+        self.params = {
+            "theta_s": 0.425,
+            "theta_fc": 0.287,
+            "theta_wp": 0.14,
+            "zr": 0.5,
+            "zr_factor": 1000,
+            "p": 0.5,
+            "draintime": 16.3,
+            "refill_factor": 0.8,
+        }
+        self.df = pd.DataFrame(
+            data={
+                "effective_precipitation": rng.uniform(0, 1, 60) ** 8 * 100,
+                "crop_evapotranspiration": rng.uniform(0, 8, 60),
+                "actual_net_irrigation": rng.choice(
+                    np.array([0, 20.5, "model", "fc"], dtype=object), 60
+                ),
+            },
+            index=pd.date_range("2016-03-10", periods=60),
+        )
+        self.full_result = calculate_soil_water(
+            timeseries=self.df, theta_init=0.2, **self.params
+        )
+
+    def test_state_is_last_day(self):
+        self.assertEqual(
+            self.full_result["state"],
+            SoilWaterState(theta=self.df["theta"].iloc[-1], dr=self.df["dr"].iloc[-1]),
+        )
+
+    def test_resume(self):
+        first_part = self.df.iloc[:45, :3].copy()
+        second_part = self.df.iloc[45:, :3].copy()
+        first_result = calculate_soil_water(
+            timeseries=first_part, theta_init=0.2, **self.params
+        )
+        second_result = calculate_soil_water(
+            timeseries=second_part,
+            initial_state=first_result["state"],
+            **self.params,
+        )
+        pd.testing.assert_frame_equal(
+            pd.concat([first_part, second_part]), self.df, check_exact=True
+        )
+        self.assertEqual(second_result["state"], self.full_result["state"])
+
+    def test_resume_with_empty_timeseries(self):
+        timeseries = self.df.iloc[:0, :3].copy()
+        result = calculate_soil_water(
+            timeseries=timeseries,
+            initial_state=self.full_result["state"],
+            **self.params,
+        )
+        self.assertEqual(result["state"], self.full_result["state"])
+
+
+class StreamTestCase(TestCase):
+    """Test that streaming gives the same result as running at once."""
+
+    def setUp(self):
+        rng = np.random.default_rng(42)
+        self.params = {
+            "theta_s": 0.425,
+            "theta_fc": 0.287,
+            "theta_wp": 0.14,
+            "zr": 0.5,
+            "zr_factor": 1000,
+            "p": 0.5,
+            "draintime": 16.3,
+            "theta_init": 0.2,
+            "refill_factor": 0.8,
+        }
+        self.df = pd.DataFrame(
+            data={
+                "effective_precipitation": rng.uniform(0, 1, 60) ** 8 * 100,
+                "crop_evapotranspiration": rng.uniform(0, 8, 60),
+                "actual_net_irrigation": rng.choice(
+                    np.array([0, 20.5, "model", "fc"], dtype=object), 60
+                ),
+            },
+            index=pd.date_range("2016-03-10", periods=60),
+        )
+        self.input_df = self.df.copy()
+        calculate_soil_water(timeseries=self.df, **self.params)
+
+    def test_records(self):
+        records = (
+            {"date": date, **row}
+            for date, row in self.input_df.to_dict("index").items()
+        )
+        result = pd.DataFrame(
+            calculate_soil_water_stream(records, **self.params)
+        ).set_index("date")
+        result.index.name = None
+        result.index.freq = "D"
+        pd.testing.assert_frame_equal(result, self.df, check_exact=True)
+
+    def test_chunks(self):
+        chunks = (
+            self.input_df.iloc[start:end].copy()
+            for start, end in zip(range(0, 60, 7), range(7, 67, 7))
+        )
+        result = pd.concat(calculate_soil_water_stream(chunks, **self.params))
+        pd.testing.assert_frame_equal(result, self.df, check_exact=True)
+
+
+class CalculateSoilWaterArraysTestCase(TestCase):
+    def test_same_as_dataframe(self):
+        params = {
+            "theta_s": 0.5,
+            "theta_fc": 0.4,
+            "theta_wp": 0.1,
+            "zr": 0.95,
+            "zr_factor": 1000,
+            "p": 0.5,
+            "draintime": 28.6,
+            "theta_init": 0.45,
+            "refill_factor": 0.5,
+        }
+        data = {
+            "effective_precipitation": [0, 0, 0, 4, 0],
+            "actual_net_irrigation": ["fc", 0, 0, "fc", "model"],
+            "crop_evapotranspiration": [1, 49, 350, 3.5, 49],
+        }
+        df = pd.DataFrame(data, index=pd.date_range("2018-03-15", periods=5))
+        expected = calculate_soil_water(timeseries=df, **params)
+        result = calculate_soil_water_arrays(**data, **params)
+        self.assertEqual(result["taw"], expected["taw"])
+        self.assertEqual(result["state"], expected["state"])
+        for name in ("dr", "theta", "ks", "recommended_net_irrigation"):
+            np.testing.assert_array_equal(result[name], df[name])
+
+    def test_scalar_irrigation(self):
+        result = calculate_soil_water_arrays(
+            theta_s=0.5,
+            theta_fc=0.4,
+            theta_wp=0.1,
+            zr=0.95,
+            zr_factor=1000,
+            p=0.5,
+            draintime=28.6,
+            theta_init=0.4,
+            refill_factor=0.5,
+            effective_precipitation=[0, 0, 4, 0],
+            crop_evapotranspiration=[49, 350, 3.5, 49],
+            actual_net_irrigation="model",
+        )
+        # Compare with AutoApplyIrrigationTestCase
+        np.testing.assert_almost_equal(
+            result["assumed_net_irrigation"], [0, 199.5, 98.8, 73.9], decimal=1
+        )
+
+
+class InstrumentationTestCase(TestCase):
+    def setUp(self):
+        self.params = {
+            "theta_s": 0.5,
+            "theta_fc": 0.4,
+            "theta_wp": 0.1,
+            "zr": 0.95,
+            "zr_factor": 1000,
+            "p": 0.5,
+            "draintime": 28.6,
+            "theta_init": 0.45,
+            "refill_factor": 0.5,
+        }
+        self.data = {
+            "effective_precipitation": [0, 0, 0, 4, 0],
+            "actual_net_irrigation": ["fc", 0, 0, "fc", "model"],
+            "crop_evapotranspiration": [1, 49, 350, 3.5, 49],
+        }
+
+    def test_no_diagnostics_by_default(self):
+        df = pd.DataFrame(self.data, index=pd.date_range("2018-03-15", periods=5))
+        calculate_soil_water(timeseries=df, **self.params)
+        for name in DIAGNOSTIC_COLUMNS:
+            self.assertNotIn(name, df.columns)
+
+    def test_diagnostics(self):
+        df = pd.DataFrame(self.data, index=pd.date_range("2018-03-15", periods=5))
+        calculate_soil_water(timeseries=df, diagnostics=True, **self.params)
+        model = SoilWaterBalance(timeseries=df, **self.params)
+        theta_prev = np.concatenate([[0.45], df["theta"][:-1]])
+        dr_prev = np.concatenate([[model.dr_from_theta(0.45)], df["dr"][:-1]])
+        for i, (date, row) in enumerate(df.iterrows()):
+            peff = row["effective_precipitation"]
+            self.assertEqual(row["ro"], model.ro(peff, theta_prev[i]))
+            self.assertEqual(row["dp"], model.dp(theta_prev[i], peff))
+            self.assertEqual(
+                row["dr_without_irrig"],
+                model.dr_without_irrig(dr_prev[i], theta_prev[i], row["ks"], row),
+            )
+
+    def test_diagnostics_arrays(self):
+        df = pd.DataFrame(self.data, index=pd.date_range("2018-03-15", periods=5))
+        calculate_soil_water(timeseries=df, diagnostics=True, **self.params)
+        result = calculate_soil_water_arrays(
+            diagnostics=True, **self.data, **self.params
+        )
+        for name in DIAGNOSTIC_COLUMNS:
+            np.testing.assert_array_equal(result[name], df[name])
+
+    def test_timings(self):
+        df = pd.DataFrame(self.data, index=pd.date_range("2018-03-15", periods=5))
+        timings = {}
+        calculate_soil_water(timeseries=df, timings=timings, **self.params)
+        calculate_soil_water(timeseries=df, timings=timings, **self.params)
+        self.assertEqual(
+            set(timings), {"input_extraction", "recurrence", "output_writeback"}
+        )
+        for value in timings.values():
+            self.assertGreaterEqual(value, 0)
+
+
+class SelectedOutputsTestCase(TestCase):
+    def setUp(self):
+        self.params = {
+            "theta_s": 0.5,
+            "theta_fc": 0.4,
+            "theta_wp": 0.1,
+            "zr": 0.95,
+            "zr_factor": 1000,
+            "p": 0.5,
+            "draintime": 28.6,
+            "theta_init": 0.45,
+            "refill_factor": 0.5,
+        }
+        self.data = {
+            "effective_precipitation": [0, 0, 0, 4, 0],
+            "actual_net_irrigation": ["fc", 0, 0, "fc", "model"],
+            "crop_evapotranspiration": [1, 49, 350, 3.5, 49],
+        }
+        self.expected = pd.DataFrame(
+            self.data, index=pd.date_range("2018-03-15", periods=5)
+        )
+        self.expected_result = calculate_soil_water(
+            timeseries=self.expected, **self.params
+        )
+
+    def test_columns(self):
+        df = pd.DataFrame(self.data, index=pd.date_range("2018-03-15", periods=5))
+        calculate_soil_water(
+            timeseries=df,
+            outputs=("theta", "recommended_net_irrigation"),
+            dtype=np.float32,
+            **self.params,
+        )
+        self.assertEqual(
+            list(df.columns),
+            list(self.data) + ["theta", "recommended_net_irrigation"],
+        )
+        for name in ("theta", "recommended_net_irrigation"):
+            self.assertEqual(df[name].dtype, np.float32)
+            np.testing.assert_array_equal(
+                df[name], self.expected[name].to_numpy(dtype=np.float32)
+            )
+
+    def test_state_is_full_precision(self):
+        result = calculate_soil_water_arrays(
+            outputs=(), dtype=np.float32, **self.data, **self.params
+        )
+        self.assertEqual(result["state"], self.expected_result["state"])
+        self.assertEqual(set(result), {"raw", "taw", "state"})
+
+    def test_unknown_output(self):
+        with self.assertRaises(ValueError):
+            calculate_soil_water_arrays(outputs=("rain",), **self.data, **self.params)
+
+
+class EncodeActualNetIrrigationTestCase(TestCase):
+    def test_mixed(self):
+        mode, amount = encode_actual_net_irrigation(
+            pd.Series(["fc", 0, 12.5, "model", "3"])
+        )
+        self.assertEqual(mode.dtype, np.int8)
+        np.testing.assert_array_equal(
+            mode,
+            [
+                IRRIGATION_FC,
+                IRRIGATION_NUMERIC,
+                IRRIGATION_NUMERIC,
+                IRRIGATION_MODEL,
+                IRRIGATION_NUMERIC,
+            ],
+        )
+        np.testing.assert_array_equal(amount, [0, 0, 12.5, 0, 3])
+
+    def test_numeric(self):
+        mode, amount = encode_actual_net_irrigation([1, 2])
+        np.testing.assert_array_equal(mode, [IRRIGATION_NUMERIC] * 2)
+        np.testing.assert_array_equal(amount, [1, 2])
+
+    def test_scalar(self):
+        result = encode_actual_net_irrigation("model")
+        self.assertEqual(result.mode, IRRIGATION_MODEL)
+        self.assertEqual(result.mode.shape, ())
+
+    def test_net_irrigation(self):
+        result = encode_actual_net_irrigation(NetIrrigation([0, 2], 3.5))
+        np.testing.assert_array_equal(result.mode, [0, 2])
+        np.testing.assert_array_equal(result.amount, [3.5, 3.5])
+
+    def test_invalid_mode(self):
+        with self.assertRaises(ValueError):
+            encode_actual_net_irrigation(NetIrrigation([0, 3], [0, 0]))
+
+
+class TypedActualNetIrrigationTestCase(TestCase):
+    def setUp(self):
+        self.params = {
+            "theta_s": 0.5,
+            "theta_fc": 0.4,
+            "theta_wp": 0.1,
+            "zr": 0.95,
+            "zr_factor": 1000,
+            "p": 0.5,
+            "draintime": 28.6,
+            "theta_init": 0.45,
+            "refill_factor": 0.5,
+        }
+        self.legacy = pd.DataFrame(
+            {
+                "effective_precipitation": [0, 0, 0, 4, 0],
+                "actual_net_irrigation": ["fc", 0, 20, "fc", "model"],
+                "crop_evapotranspiration": [1, 49, 350, 3.5, 49],
+            },
+            index=pd.date_range("2018-03-15", periods=5),
+        )
+        mode, amount = encode_actual_net_irrigation(
+            self.legacy["actual_net_irrigation"]
+        )
+        self.typed = self.legacy.drop(columns=["actual_net_irrigation"]).assign(
+            actual_net_irrigation_mode=mode, actual_net_irrigation_amount=amount
+        )
+        calculate_soil_water(timeseries=self.legacy, **self.params)
+
+    def test_dataframe(self):
+        calculate_soil_water(timeseries=self.typed, **self.params)
+        for name in ("dr", "theta", "assumed_net_irrigation"):
+            np.testing.assert_array_equal(self.typed[name], self.legacy[name])
+
+    def test_arrays(self):
+        result = calculate_soil_water_arrays(
+            effective_precipitation=self.typed["effective_precipitation"],
+            crop_evapotranspiration=self.typed["crop_evapotranspiration"],
+            actual_net_irrigation=NetIrrigation(
+                self.typed["actual_net_irrigation_mode"],
+                self.typed["actual_net_irrigation_amount"],
+            ),
+            **self.params,
+        )
+        np.testing.assert_array_equal(result["dr"], self.legacy["dr"])
+
+    def test_records(self):
+        records = self.typed.to_dict("records")
+        results = list(calculate_soil_water_stream(records, **self.params))
+        np.testing.assert_array_equal(
+            [result["dr"] for result in results], self.legacy["dr"]
+        )
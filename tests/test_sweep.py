@@ -0,0 +1,81 @@
+from unittest import TestCase
+
+import numpy as np
+
+from swb import calculate_soil_water_batch, calculate_soil_water_sweep
+
+
+class CalculateSoilWaterSweepTestCase(TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(42)
+        self.inputs = {
+            "effective_precipitation": rng.uniform(0, 1, 50) ** 8 * 100,
+            "crop_evapotranspiration": rng.uniform(0, 8, 50),
+            "actual_net_irrigation": "model",
+        }
+        self.fixed_params = {
+            "theta_s": 0.425,
+            "theta_fc": 0.287,
+            "theta_wp": 0.14,
+            "zr_factor": 1000,
+            "theta_init": 0.2,
+        }
+        self.grid = {
+            "p": [0.4, 0.5, 0.6],
+            "zr": [0.3, 0.5],
+            "draintime": [2.2, 16.3],
+            "refill_factor": [0.5, 1.0],
+        }
+        self.result = calculate_soil_water_sweep(
+            grid=self.grid,
+            batch_size=5,
+            timeseries_outputs=("theta", "ks"),
+            **self.inputs,
+            **self.fixed_params,
+        )
+        self.parameters = self.result["parameters"]
+        self.expected = calculate_soil_water_batch(
+            **self.inputs, **self.fixed_params, **self.parameters
+        )
+
+    def test_number_of_combinations(self):
+        self.assertEqual(len(self.parameters["p"]), 24)
+        self.assertEqual(
+            len(set(zip(*[self.parameters[name] for name in self.grid]))), 24
+        )
+
+    def test_total_recommended_net_irrigation(self):
+        np.testing.assert_array_equal(
+            self.result["total_recommended_net_irrigation"],
+            self.expected["recommended_net_irrigation"].sum(axis=1),
+        )
+
+    def test_stress_days(self):
+        np.testing.assert_array_equal(
+            self.result["stress_days"], (self.expected["ks"] < 1).sum(axis=1)
+        )
+
+    def test_final_dr(self):
+        np.testing.assert_array_equal(
+            self.result["final_dr"], self.expected["dr"][:, -1]
+        )
+
+    def test_timeseries_outputs(self):
+        np.testing.assert_array_equal(self.result["theta"], self.expected["theta"])
+        np.testing.assert_array_equal(self.result["ks"], self.expected["ks"])
+        self.assertNotIn("dr", self.result)
+
+    def test_design(self):
+        design = {name: values[:7] for name, values in self.parameters.items()}
+        result = calculate_soil_water_sweep(
+            design=design, **self.inputs, **self.fixed_params
+        )
+        np.testing.assert_array_equal(
+            result["final_theta"], self.expected["theta"][:7, -1]
+        )
+
+    def test_fixed_and_varying_parameter(self):
+        with self.assertRaises(ValueError):
+            calculate_soil_water_sweep(
+                grid=self.grid, p=0.5, **self.inputs, **self.fixed_params
+            )